@@ -2,8 +2,15 @@ import streamlit as st
 import os
 import json
 import time
+import html
 from pathlib import Path
-from main import process_story, generate_script_only, generate_media_from_script
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from main import (
+    process_story, generate_script_only, generate_media_from_script,
+    clean_output_directory, ensure_directories,
+    freeze_scenes
+)
 
 # Set page config
 st.set_page_config(
@@ -13,8 +20,10 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Apply custom CSS for better styling
-st.markdown("""
+@st.cache_resource
+def get_custom_css():
+    """Build the custom stylesheet once per server process"""
+    return """
 <style>
     .main-title {
         text-align: center;
@@ -68,14 +77,83 @@ st.markdown("""
         cursor: pointer;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Apply custom CSS for better styling
+st.markdown(get_custom_css(), unsafe_allow_html=True)
+
+@st.cache_resource
+def get_media_executor():
+    """Shared worker that runs media generation outside the Streamlit script thread"""
+    return ThreadPoolExecutor(max_workers=1)
+
+@st.cache_resource
+def load_story_templates():
+    """Sample story templates, built once and shared read-only across reruns"""
+    return MappingProxyType({
+        "Adventure": "The explorer stood at the edge of the ancient ruins, heart pounding with anticipation. After years of research, the lost city was finally before them. As they stepped inside the grand entrance, torchlight revealed glittering treasures beyond imagination. But a sudden rumble warned that disturbing this place had awakened something long forgotten, something that had been waiting centuries for an intruder.",
+        "Mystery": "The detective examined the curious note left at the crime scene. The handwriting was elegant, the message cryptic: 'When midnight strikes thrice, truth will emerge from shadow.' The room showed no signs of forced entry, yet the valuable painting had vanished. More puzzling still was the single white glove placed precisely where the artwork had hung.",
+        "Fantasy": "The young wizard apprentice accidentally mixed the wrong herbs into the potion. Instead of creating a simple light spell, the cauldron erupted with swirling blue mist that engulfed the room. When it cleared, everything it had touched was now floating gently toward the ceiling, including the master wizard's prized magical cat, who looked thoroughly unimpressed with the situation.",
+    })
+
+def find_existing_file(*candidates):
+    """Return the first candidate path that exists as a file (as a string), or None"""
+    for candidate in candidates:
+        if candidate.is_file():
+            return str(candidate)
+    return None
+
+def snapshot_media_assets(scenes, output_paths):
+    """
+    Check once which generated files exist so the results page can render
+    without re-checking the filesystem on every rerun
+    
+    Args:
+        scenes: Tuple of Scene objects
+        output_paths: Paths returned by generate_media_from_script
+        
+    Returns:
+        Tuple of (per-scene asset dicts, music path or None, video path or None)
+    """
+    # Directory paths are built once; the render loop only indexes the result
+    voice_dir = Path("outputs", "voice")
+    image_dir = Path("outputs", "images")
+    music_dir = Path("outputs", "music")
+    
+    scene_assets = [
+        {
+            "voice": find_existing_file(voice_dir / f"scene_{i+1}.wav", voice_dir / f"scene_{i+1}.mp3"),
+            "image": find_existing_file(image_dir / f"scene_{i+1}.png"),
+            "thumb": find_existing_file(image_dir / f"scene_{i+1}_thumb.jpg")
+        }
+        for i in range(len(scenes))
+    ]
+    music_path = find_existing_file(music_dir / "bg_music.wav", music_dir / "bg_music.mp3")
+    video_path = output_paths.get("video", "")
+    video_path = find_existing_file(Path(video_path)) if video_path else None
+    
+    return scene_assets, music_path, video_path
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def load_video_bytes(path, mtime):
+    """Read the final video once; mtime is part of the cache key so a new render invalidates it"""
+    return Path(path).read_bytes()
+
+def build_review_html(scenes):
+    """Render the whole script review as one HTML block so it is sent in a single st.markdown call"""
+    scene_boxes = "".join(
+        f"<div class='script-box'>"
+        f"<h4>Scene {i+1}</h4>"
+        f"<div class='scene-description'><strong>Visual Description:</strong> {html.escape(scene.description)}</div>"
+        f"<div class='scene-narration'><strong>Narration:</strong> \"{html.escape(scene.narration)}\"</div>"
+        f"<div><strong>Emotional Tone:</strong> {html.escape(scene.tone or 'neutral')}</div>"
+        f"</div>"
+        for i, scene in enumerate(scenes)
+    )
+    return f"<div class='output-container'>{scene_boxes}</div>"
 
 # Sample story templates
-STORY_TEMPLATES = {
-    "Adventure": "The explorer stood at the edge of the ancient ruins, heart pounding with anticipation. After years of research, the lost city was finally before them. As they stepped inside the grand entrance, torchlight revealed glittering treasures beyond imagination. But a sudden rumble warned that disturbing this place had awakened something long forgotten, something that had been waiting centuries for an intruder.",
-    "Mystery": "The detective examined the curious note left at the crime scene. The handwriting was elegant, the message cryptic: 'When midnight strikes thrice, truth will emerge from shadow.' The room showed no signs of forced entry, yet the valuable painting had vanished. More puzzling still was the single white glove placed precisely where the artwork had hung.",
-    "Fantasy": "The young wizard apprentice accidentally mixed the wrong herbs into the potion. Instead of creating a simple light spell, the cauldron erupted with swirling blue mist that engulfed the room. When it cleared, everything it had touched was now floating gently toward the ceiling, including the master wizard's prized magical cat, who looked thoroughly unimpressed with the situation.",
-}
+STORY_TEMPLATES = load_story_templates()
 
 # Initialize session state
 if "story_submitted" not in st.session_state:
@@ -89,11 +167,23 @@ if "processing_complete" not in st.session_state:
 if "progress" not in st.session_state:
     st.session_state.progress = 0
 if "scenes" not in st.session_state:
-    st.session_state.scenes = []
+    st.session_state.scenes = ()
 if "current_step" not in st.session_state:
     st.session_state.current_step = None
 if "output_paths" not in st.session_state:
     st.session_state.output_paths = {}
+if "media_future" not in st.session_state:
+    st.session_state.media_future = None
+if "progress_dict" not in st.session_state:
+    st.session_state.progress_dict = {}
+if "review_html" not in st.session_state:
+    st.session_state.review_html = None
+if "scene_assets" not in st.session_state:
+    st.session_state.scene_assets = []
+if "music_asset" not in st.session_state:
+    st.session_state.music_asset = None
+if "video_asset" not in st.session_state:
+    st.session_state.video_asset = None
 
 # Header
 st.markdown("<h1 class='main-title'>🎬 AI ShortStory Studio</h1>", unsafe_allow_html=True)
@@ -140,22 +230,20 @@ if not st.session_state.script_generated:
             st.session_state.story_submitted = True
             
             # Create folders if they don't exist
-            for folder in ["outputs", "outputs/images", "outputs/voice", "outputs/music"]:
-                os.makedirs(folder, exist_ok=True)
-                
-            # Save the story to a file
-            with open("outputs/story.txt", "w") as f:
-                f.write(story_text)
+            ensure_directories()
             
             # Generate script only
             with st.spinner("Creating your script..."):
                 st.session_state.current_step = "Breaking story into scenes"
                 st.session_state.progress = 0.3
                 
-                # Call function to generate script only
+                # Call function to generate script only; story_to_scenes serves
+                # repeat requests from its cache of successful API responses
                 scenes_path, scenes = generate_script_only(story_text)
                 
-                st.session_state.scenes = scenes
+                # Frozen scenes can't be altered by accident between reruns
+                st.session_state.scenes = freeze_scenes(scenes)
+                st.session_state.review_html = None
                 st.session_state.output_paths = {"scenes": scenes_path}
                 st.session_state.script_generated = True
                 st.session_state.progress = 0.5
@@ -169,18 +257,12 @@ elif st.session_state.script_generated and not st.session_state.script_approved:
     st.markdown("<h3 class='step-header'>Step 2: Review and Approve Script</h3>", unsafe_allow_html=True)
     
     # Display the generated script for review
-    st.markdown("<div class='output-container'>", unsafe_allow_html=True)
     st.subheader("Your Generated Script")
     
-    for i, scene in enumerate(st.session_state.scenes):
-        st.markdown(f"<div class='script-box'>", unsafe_allow_html=True)
-        st.markdown(f"#### Scene {i+1}")
-        st.markdown(f"<div class='scene-description'><strong>Visual Description:</strong> {scene.get('description', '')}</div>", unsafe_allow_html=True)
-        st.markdown(f"<div class='scene-narration'><strong>Narration:</strong> \"{scene.get('narration', '')}\"</div>", unsafe_allow_html=True)
-        st.markdown(f"<strong>Emotional Tone:</strong> {scene.get('tone', 'neutral')}")
-        st.markdown("</div>", unsafe_allow_html=True)
-    
-    st.markdown("</div>", unsafe_allow_html=True)
+    # Scenes don't change during review, so build the HTML once and reuse it on reruns
+    if st.session_state.review_html is None:
+        st.session_state.review_html = build_review_html(st.session_state.scenes)
+    st.markdown(st.session_state.review_html, unsafe_allow_html=True)
     
     # Approve button
     col1, col2 = st.columns([1, 1])
@@ -199,97 +281,137 @@ elif st.session_state.script_generated and not st.session_state.script_approved:
             st.session_state.current_step = "Generating images"
             st.session_state.progress = 0.5
             
-            # Start the media generation process
-            with st.spinner("Creating your multimedia experience..."):
-                # Process the approved script to generate media
-                output_paths = generate_media_from_script(st.session_state.scenes)
-                st.session_state.output_paths.update(output_paths)
-                
-                st.session_state.processing_complete = True
-                st.session_state.progress = 1.0
+            # Progress is written from the worker thread, so keep a plain dict
+            # rather than touching session_state outside the script thread
+            progress_dict = {"step": "Generating images", "fraction": 0.0}
+            
+            def update_progress(step, fraction):
+                progress_dict["step"] = step
+                progress_dict["fraction"] = fraction
+            
+            # Start the media generation process in the background
+            st.session_state.progress_dict = progress_dict
+            # The scenes are unchanged since generate_script_only saved them
+            st.session_state.media_future = get_media_executor().submit(
+                generate_media_from_script,
+                st.session_state.scenes,
+                update_progress,
+                st.session_state.output_paths.get("scenes")
+            )
             
             st.rerun()
 
 # Progress tracking if script approved but processing is not complete
 elif st.session_state.script_approved and not st.session_state.processing_complete:
     st.markdown("<h3 class='step-header'>Creating Your Media</h3>", unsafe_allow_html=True)
+    
     progress_bar = st.progress(st.session_state.progress)
+    status = st.empty()
     
-    st.info(f"Current step: {st.session_state.current_step}")
+    # Update the placeholders in place while the worker runs instead of
+    # re-executing the whole script for every progress tick
+    progress_dict = st.session_state.progress_dict
+    future = st.session_state.media_future
+    while True:
+        finished = future is None or future.done()
+        
+        # Media generation covers the second half of the overall progress
+        st.session_state.current_step = progress_dict.get("step", st.session_state.current_step)
+        st.session_state.progress = 0.5 + 0.5 * progress_dict.get("fraction", 0.0)
+        progress_bar.progress(st.session_state.progress)
+        status.info(f"Current step: {st.session_state.current_step}")
+        
+        if finished:
+            break
+        time.sleep(0.25)
     
-    # Simulate progress updates (in real implementation, this would be updated by the background process)
-    if st.session_state.progress < 1.0:
-        time.sleep(0.1)
-        st.session_state.progress += 0.01
-        if st.session_state.progress >= 0.6 and st.session_state.current_step == "Generating images":
-            st.session_state.current_step = "Creating voice narration"
-        elif st.session_state.progress >= 0.75 and st.session_state.current_step == "Creating voice narration":
-            st.session_state.current_step = "Composing background music"
-        elif st.session_state.progress >= 0.9 and st.session_state.current_step == "Composing background music":
-            st.session_state.current_step = "Assembling final video"
-            
-        st.rerun()
+    output_paths = future.result() if future is not None else {}
+    st.session_state.output_paths.update(output_paths)
+    st.session_state.media_future = None
+    
+    # Snapshot which files were produced before showing the results
+    (st.session_state.scene_assets,
+     st.session_state.music_asset,
+     st.session_state.video_asset) = snapshot_media_assets(
+        st.session_state.scenes, st.session_state.output_paths
+    )
+    
+    st.session_state.processing_complete = True
+    st.session_state.progress = 1.0
+    st.rerun()
 
 # Results section (shown when processing is complete)
 if st.session_state.processing_complete:
     st.markdown("<h3 class='step-header'>Your Story Experience</h3>", unsafe_allow_html=True)
     
     # Display scenes and generated content
-    for i, scene in enumerate(st.session_state.scenes):
+    for i, (scene, assets) in enumerate(zip(st.session_state.scenes, st.session_state.scene_assets)):
         with st.expander(f"Scene {i+1}", expanded=True):
             col1, col2 = st.columns([1, 1])
             
             with col1:
-                # Display the scene description
+                # Display the scene description (plain prose, no markdown parsing needed)
                 st.markdown(f"**Description:**")
-                st.markdown(scene.get("description", ""))
+                st.text(scene.description)
                 
                 # Display voice narration if available
-                voice_path = os.path.join("outputs", "voice", f"scene_{i+1}.mp3")
-                if os.path.exists(voice_path):
+                if assets["voice"] is not None:
                     st.markdown("**Narration:**")
-                    st.audio(voice_path)
+                    st.audio(assets["voice"])
                 
             with col2:
-                # Display generated image if available
-                image_path = os.path.join("outputs", "images", f"scene_{i+1}.png")
-                if os.path.exists(image_path):
-                    st.image(image_path, use_container_width=True)
+                # Display generated image if available, as a light thumbnail when one exists
+                if assets["image"] is not None:
+                    if assets["thumb"] is None:
+                        st.image(assets["image"], use_container_width=True)
+                    else:
+                        st.image(assets["thumb"], use_container_width=True)
+                        # The full PNG is only sent to the browser once requested
+                        if st.toggle("Show full size", key=f"full_image_{i}"):
+                            st.image(assets["image"], use_container_width=True)
     
     # Display background music if available
-    music_path = os.path.join("outputs", "music", "bg_music.mp3")
-    if os.path.exists(music_path):
+    music_path = st.session_state.music_asset
+    if music_path is not None:
         st.markdown("**Background Music:**")
         st.audio(music_path)
     
     # Display final video if available
-    video_path = st.session_state.output_paths.get("video", "")
-    if os.path.exists(video_path):
+    video_path = st.session_state.video_asset
+    if video_path is not None:
         st.markdown("**Final Story Experience:**")
         st.video(video_path)
         
         # Download button for the video
-        with open(video_path, "rb") as file:
-            st.download_button(
-                label="Download Video",
-                data=file,
-                file_name="ai_story_experience.mp4",
-                mime="video/mp4"
-            )
+        st.download_button(
+            label="Download Video",
+            data=load_video_bytes(video_path, os.path.getmtime(video_path)),
+            file_name="ai_story_experience.mp4",
+            mime="video/mp4"
+        )
     else:
         st.error("Video generation failed. Please check the logs.")
 
     # Reset button
     if st.button("Create Another Story", use_container_width=True):
+        # Remove this story's media so the next one starts fresh
+        clean_output_directory()
+        
         # Reset session state
         st.session_state.story_submitted = False
         st.session_state.script_generated = False
         st.session_state.script_approved = False
         st.session_state.processing_complete = False
         st.session_state.progress = 0
-        st.session_state.scenes = []
+        st.session_state.scenes = ()
+        st.session_state.review_html = None
         st.session_state.current_step = None
         st.session_state.output_paths = {}
+        st.session_state.media_future = None
+        st.session_state.progress_dict = {}
+        st.session_state.scene_assets = []
+        st.session_state.music_asset = None
+        st.session_state.video_asset = None
         st.rerun()
 
 # Footer
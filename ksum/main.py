@@ -1,7 +1,9 @@
 import os
 import json
 import time
-from typing import Dict, Any, List, Tuple
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Tuple, Callable, Optional, Sequence, Union, NamedTuple
 from pathlib import Path
 
 # Import utility modules
@@ -11,98 +13,159 @@ from utils.voice_generator import generate_voice_for_scenes
 from utils.music_generator import generate_music_for_story
 from utils.video_generator import create_story_video
 
-def ensure_directories():
-    """Ensure all required directories exist"""
-    directories = [
-        "outputs",
-        "outputs/images",
-        "outputs/voice",
-        "outputs/music",
-        "outputs/music/fallbacks"
+# Pipeline progress goes through logging so it costs nothing unless enabled;
+# set KSUM_LOG_LEVEL=INFO to see it (the CLI entry point enables it by default)
+# (unknown level names fall back to WARNING rather than failing the import)
+logger = logging.getLogger(__name__)
+LOG_LEVEL = logging.getLevelName(os.getenv("KSUM_LOG_LEVEL", "WARNING").upper())
+logger.setLevel(LOG_LEVEL if isinstance(LOG_LEVEL, int) else logging.WARNING)
+
+# Set KSUM_DEBUG=1 to keep human-readable intermediate files
+DEBUG = os.getenv("KSUM_DEBUG", "").lower() in ("1", "true", "yes")
+
+class Scene(NamedTuple):
+    """Immutable scene of an approved script, as kept between Streamlit reruns"""
+    description: str = ""
+    narration: str = ""
+    tone: Optional[str] = None
+    image_prompt: Optional[str] = None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style lookup so the media generators accept scenes and dicts alike"""
+        value = getattr(self, key, None)
+        return default if value is None else value
+    
+    @classmethod
+    def from_dict(cls, scene: Dict[str, Any]) -> "Scene":
+        """Build a scene from its JSON form, ignoring fields the pipeline doesn't use"""
+        return cls(**{name: scene[name] for name in SCENE_FIELDS if scene.get(name) is not None})
+
+# Scene attributes, in JSON key order
+SCENE_FIELDS = Scene._fields
+
+def freeze_scenes(scenes: Sequence[Union[Scene, Dict[str, Any]]]) -> Tuple[Scene, ...]:
+    """Convert generated scene dictionaries into an immutable tuple of Scene objects"""
+    return tuple(scene if isinstance(scene, Scene) else Scene.from_dict(scene) for scene in scenes)
+
+def scenes_to_dicts(scenes: Sequence[Union[Scene, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Convert scenes back to plain dictionaries for JSON output, leaving out unset fields"""
+    return [
+        {key: value for key, value in scene._asdict().items() if value is not None}
+        if isinstance(scene, Scene) else scene
+        for scene in scenes
     ]
+
+# Output directories required by the pipeline
+OUTPUT_DIRECTORIES = [
+    "outputs",
+    "outputs/images",
+    "outputs/voice",
+    "outputs/music",
+    "outputs/music/fallbacks"
+]
+
+# Set once the output directories have been created in this process
+_DIRS_READY = False
+
+def ensure_directories():
+    """Ensure all required directories exist (only touches the filesystem once per process)"""
+    global _DIRS_READY
+    if _DIRS_READY:
+        return
     
-    for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+    for directory in OUTPUT_DIRECTORIES:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+    
+    _DIRS_READY = True
+
+# Stale files removed before a new story: directory -> (filename prefix, suffixes)
+CLEANUP_TARGETS = {
+    "outputs": ("", (".json", ".mp4")),
+    "outputs/images": ("scene_", (".png", "_thumb.jpg")),
+    "outputs/voice": ("scene_", (".mp3",))
+}
 
 def clean_output_directory():
     """Clean output directory to avoid using old files"""
-    import glob
-    
-    # Remove old scene files
-    for filepath in glob.glob("outputs/*.json"):
-        try:
-            os.remove(filepath)
-        except:
-            pass
-    
-    # Remove old image files        
-    for filepath in glob.glob("outputs/images/scene_*.png"):
-        try:
-            os.remove(filepath)
-        except:
-            pass
-            
-    # Remove old voice files
-    for filepath in glob.glob("outputs/voice/scene_*.mp3"):
-        try:
-            os.remove(filepath)
-        except:
-            pass
-            
-    # Remove old video files
-    for filepath in glob.glob("outputs/*.mp4"):
-        try:
-            os.remove(filepath)
-        except:
-            pass
-
-def generate_script_only(story_text: str) -> Tuple[str, List[Dict[str, Any]]]:
+    # Single directory pass per target instead of one glob per pattern
+    for directory, (prefix, suffixes) in CLEANUP_TARGETS.items():
+        if not os.path.isdir(directory):
+            continue
+        
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.name.endswith(suffixes) and entry.is_file():
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+
+def save_story(story_text: str, story_path: str = "outputs/story.txt") -> str:
+    """Save the original story, skipping the write if the file already holds the same text"""
+    path = Path(story_path)
+    if not (path.is_file() and path.read_text(encoding="utf-8") == story_text):
+        path.write_text(story_text, encoding="utf-8")
+    return story_path
+
+def generate_script_only(story_text: str, clean: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
     """
     First step: Generate just the script/scenes from the story
     
     Args:
         story_text: The input short story text
+        clean: Remove media left over from a previous story before generating
         
     Returns:
         Tuple of (path to scenes JSON, list of scene dictionaries)
     """
     try:
-        # Clean output directory
-        clean_output_directory()
+        # Clean output directory if requested
+        if clean:
+            clean_output_directory()
         
         # Ensure directories exist
         ensure_directories()
         
         # Save the original story
-        story_path = "outputs/story.txt"
-        with open(story_path, "w") as f:
-            f.write(story_text)
+        save_story(story_text)
         
-        print("Generating script from story...")
+        logger.info("Generating script from story...")
         scenes_path = "outputs/scenes.json"
         scenes = story_to_scenes(story_text, scenes_path)
         
         if not scenes:
-            print("Error: Failed to generate script")
+            logger.error("Failed to generate script")
             return scenes_path, []
             
-        print(f"Generated script with {len(scenes)} scenes")
+        logger.info("Generated script with %d scenes", len(scenes))
         return scenes_path, scenes
         
     except Exception as e:
-        print(f"Error in generate_script_only: {e}")
+        logger.error("Error in generate_script_only: %s", e)
         return "outputs/scenes.json", []
 
-def generate_media_from_script(scenes: List[Dict[str, Any]]) -> Dict[str, Any]:
+def generate_media_from_script(
+    scenes: Sequence[Union[Scene, Dict[str, Any]]],
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    scenes_path: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Second step: After script approval, generate media from the scenes
     
     Args:
-        scenes: List of scene dictionaries
+        scenes: Scene objects or scene dictionaries
+        progress_callback: Optional callable receiving (step name, fraction complete)
+            between pipeline steps
+        scenes_path: Path of an up-to-date scenes JSON for these scenes (e.g. from
+            generate_script_only); when given, the scenes are not written again
         
     Returns:
         Dictionary with paths to all generated files
     """
+    def report(step: str, fraction: float):
+        if progress_callback:
+            progress_callback(step, fraction)
+    
     # Initialize result paths
     output_paths = {
         "images": [],
@@ -112,41 +175,63 @@ def generate_media_from_script(scenes: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
     
     try:
-        # Ensure scenes are saved to file
-        scenes_path = "outputs/scenes.json"
-        with open(scenes_path, "w") as f:
-            json.dump(scenes, f, indent=2)
+        # Ensure scenes are saved to file, unless the caller already has a fresh copy
+        if not (scenes_path and os.path.isfile(scenes_path)):
+            scenes_path = "outputs/scenes.json"
+            if DEBUG:
+                scenes_json = json.dumps(scenes_to_dicts(scenes), ensure_ascii=False, indent=2)
+            else:
+                scenes_json = json.dumps(scenes_to_dicts(scenes), ensure_ascii=False, separators=(",", ":"))
+            Path(scenes_path).write_text(scenes_json, encoding="utf-8")
         output_paths["scenes"] = scenes_path
         
-        # Generate images for each scene
-        print("\nStep 1: Generating images...")
-        image_paths = generate_images_for_scenes(scenes)
-        output_paths["images"] = image_paths
+        # Images, voice and music depend only on the scenes, so run them concurrently
+        media_steps = {
+            "images": ("Generating images", generate_images_for_scenes),
+            "voice": ("Creating voice narration", generate_voice_for_scenes),
+            "music": ("Composing background music", generate_music_for_story)
+        }
+        pending = [step_name for step_name, _ in media_steps.values()]
+        report(" / ".join(pending), 0.0)
+        logger.info("Steps 1-3: Generating images, voice narrations and background music...")
         
-        # Generate voice narrations for each scene
-        print("\nStep 2: Creating voice narrations...")
-        voice_paths = generate_voice_for_scenes(scenes)
-        output_paths["voice"] = voice_paths
-        
-        # Generate background music
-        print("\nStep 3: Composing background music...")
-        music_path = generate_music_for_story(scenes)
-        if music_path:
-            output_paths["music"] = music_path
+        with ThreadPoolExecutor(max_workers=len(media_steps)) as executor:
+            futures = {
+                executor.submit(generate, scenes): key
+                for key, (_, generate) in media_steps.items()
+            }
+            
+            for completed, future in enumerate(as_completed(futures), start=1):
+                key = futures[future]
+                step_name = media_steps[key][0]
+                
+                # A failure in one step should not discard the others
+                try:
+                    result = future.result()
+                    if result:
+                        output_paths[key] = result
+                except Exception as step_error:
+                    logger.error("Error in step '%s': %s", step_name, step_error)
+                
+                pending.remove(step_name)
+                if pending:
+                    report(" / ".join(pending), 0.25 * completed)
             
         # Create video
-        print("\nStep 4: Assembling final video...")
+        report("Assembling final video", 0.75)
+        logger.info("Step 4: Assembling final video...")
         video_path = create_story_video(scenes)
         if video_path:
             output_paths["video"] = video_path
-            print(f"Video created successfully: {video_path}")
+            logger.info("Video created successfully: %s", video_path)
         else:
-            print("Failed to create video")
+            logger.error("Failed to create video")
             
+        report("Complete", 1.0)
         return output_paths
         
     except Exception as e:
-        print(f"Error in generate_media_from_script: {e}")
+        logger.error("Error in generate_media_from_script: %s", e)
         return output_paths
 
 def process_story(story_text: str) -> Dict[str, str]:
@@ -160,10 +245,10 @@ def process_story(story_text: str) -> Dict[str, str]:
         Dictionary with paths to all generated files
     """
     # First generate the script
-    scenes_path, scenes = generate_script_only(story_text)
+    scenes_path, scenes = generate_script_only(story_text, clean=True)
     
     # Then generate the media from the script
-    output_paths = generate_media_from_script(scenes)
+    output_paths = generate_media_from_script(scenes, scenes_path=scenes_path)
     
     # Add the story path
     output_paths["story"] = "outputs/story.txt"
@@ -172,14 +257,18 @@ def process_story(story_text: str) -> Dict[str, str]:
 
 def main():
     """Entry point when script is run directly"""
+    # Show pipeline progress on the console unless a level was chosen explicitly
+    logging.basicConfig(format="%(message)s")
+    if "KSUM_LOG_LEVEL" not in os.environ:
+        logger.setLevel(logging.INFO)
+    
     print("🎬 AI ShortStory Studio 🎬")
     print("==========================\n")
     
     # Check if story.txt exists, otherwise use sample
     story_path = "outputs/story.txt"
     if os.path.exists(story_path):
-        with open(story_path, "r") as f:
-            story = f.read()
+        story = Path(story_path).read_text(encoding="utf-8")
     else:
         # Sample story
         story = """
@@ -195,7 +284,7 @@ def main():
     
     # First generate script only
     print("\n--- Step 1: Generating Script ---\n")
-    scenes_path, scenes = generate_script_only(story)
+    scenes_path, scenes = generate_script_only(story, clean=True)
     
     # Ask for user confirmation (in CLI mode)
     print("\nScript generated. Would you like to continue with media generation? (y/n)")
@@ -204,7 +293,7 @@ def main():
     if confirmation.lower() in ["y", "yes"]:
         # Generate media
         print("\n--- Step 2: Generating Media ---\n")
-        output_paths = generate_media_from_script(scenes)
+        output_paths = generate_media_from_script(scenes, scenes_path=scenes_path)
     else:
         print("\nMedia generation cancelled.")
         return
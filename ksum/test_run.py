@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
 
-import os
 import time
 import json
-from main import generate_script_only, generate_media_from_script
+from pathlib import Path
+from main import generate_script_only, generate_media_from_script, ensure_directories
 from utils.story_to_scenes import create_advanced_fallback_scenes
 
 # Ensure the output directories exist
-for folder in ["outputs", "outputs/images", "outputs/voice", "outputs/music"]:
-    os.makedirs(folder, exist_ok=True)
+ensure_directories()
 
 # Sample story for testing
 sample_story = """
@@ -27,8 +26,7 @@ def test_direct_scene_generation():
     
     # Save to file
     scenes_path = "outputs/direct_scenes.json"
-    with open(scenes_path, 'w') as f:
-        json.dump(scenes, f, indent=2)
+    Path(scenes_path).write_text(json.dumps(scenes, indent=2), encoding="utf-8")
     
     print(f"Generated {len(scenes)} scenes directly")
     
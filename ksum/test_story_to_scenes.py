@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import json
+from utils.story_to_scenes import _JSONStreamCollector, _parse_scenes
+
+SCENES = [
+    {
+        "description": "A brass key on a dusty table",
+        "narration": "She found the key at last.",
+        "tone": "hopeful",
+        "image_prompt": "A brass key on a dusty table, oil painting"
+    }
+]
+
+def feed_in_chunks(response, chunk_size):
+    """Feed a response to a new collector in fixed-size chunks, returning the first complete result"""
+    collector = _JSONStreamCollector()
+    for i in range(0, len(response), chunk_size):
+        result = collector.feed(response[i:i + chunk_size])
+        if result is not None:
+            return result
+    return None
+
+def test_brackets_in_earlier_string():
+    """Brackets inside a string before the scenes key don't start the array"""
+    response = json.dumps({"title": "The [Lost] Key", "scenes": SCENES})
+    for chunk_size in (1, 7, len(response)):
+        assert _parse_scenes(feed_in_chunks(response, chunk_size)) == SCENES
+
+def test_array_in_earlier_field():
+    """An array in another top-level field is skipped"""
+    response = json.dumps({"characters": ["Ann"], "scenes": SCENES})
+    for chunk_size in (1, 7, len(response)):
+        assert _parse_scenes(feed_in_chunks(response, chunk_size)) == SCENES
+
+def test_escaped_quotes_and_nested_values():
+    """Escaped quotes and a "scenes" key or value nested deeper are not taken for the top-level key"""
+    response = json.dumps({
+        "note": "say \"scenes\": [",
+        "meta": {"scenes": ["not these"]},
+        "label": "scenes",
+        "scenes": SCENES
+    })
+    for chunk_size in (1, 5, len(response)):
+        assert _parse_scenes(feed_in_chunks(response, chunk_size)) == SCENES
+
+def test_fields_before_scenes_kept():
+    """The collected text is the top-level object, closed after the scenes array"""
+    response = json.dumps({"title": "The [Lost] Key", "scenes": SCENES, "mood": "calm"})
+    assert json.loads(feed_in_chunks(response, 3)) == {"title": "The [Lost] Key", "scenes": SCENES}
+
+def test_no_scenes_key():
+    """Without a scenes key nothing is returned early and the full text is kept"""
+    response = json.dumps({"characters": ["Ann"], "title": "[x]"})
+    collector = _JSONStreamCollector()
+    assert collector.feed(response) is None
+    assert collector.text() == response
+
+if __name__ == "__main__":
+    test_brackets_in_earlier_string()
+    test_array_in_earlier_field()
+    test_escaped_quotes_and_nested_values()
+    test_fields_before_scenes_kept()
+    test_no_scenes_key()
+    print("All stream collector tests passed")
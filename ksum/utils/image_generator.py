@@ -1,23 +1,88 @@
 import os
+import re
 import requests
-import time
 import random
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance, ImageOps
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
 import numpy as np
 from typing import Optional
 import openai
 import math
+from functools import lru_cache
 from dotenv import load_dotenv
 
+# numba is optional; without it every gradient is computed with NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# OpenCV is optional; when installed it runs the placeholder blur on the pixel array
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
 # Configure OpenAI API
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-def generate_gradient_background(width, height, color1=None, color2=None, style="vertical"):
-    """Generate a gradient background with various style options"""
+# Scenes rendered at once by generate_images_for_scenes
+IMAGE_WORKERS = 4
+
+# Upper bound on simultaneous DALL-E requests; lower it for accounts with tight rate limits
+# (at least one, so a zero or negative setting can't block every request)
+MAX_CONCURRENT_API_REQUESTS = max(1, int(os.getenv("KSUM_IMAGE_API_CONCURRENCY", "2")))
+_api_slots = threading.BoundedSemaphore(MAX_CONCURRENT_API_REQUESTS)
+
+# Radial gradients at least this many pixels use the numba kernel when it is available
+RADIAL_JIT_MIN_PIXELS = 512 * 512
+
+if NUMBA_AVAILABLE:
+    # Releases the GIL rather than using numba's own threads: scenes are already
+    # rendered on worker threads
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _radial_gradient_kernel(out, color1, color2, center_x, center_y, max_dist):
+        """Fill out (height, width, 3) with a radial gradient in one pass, without temporaries"""
+        height, width = out.shape[0], out.shape[1]
+        inv_max_dist = 1.0 / max_dist
+        for y in range(height):
+            # The row term is constant across the inner loop
+            dy2 = (y - center_y) * (y - center_y)
+            for x in range(width):
+                dx = x - center_x
+                ratio = min(math.sqrt(dx * dx + dy2) * inv_max_dist, 1.0)
+                for c in range(3):
+                    out[y, x, c] = np.uint8(color1[c] + (color2[c] - color1[c]) * ratio)
+
+# Per-thread pixel buffers reused between placeholders (scenes are rendered concurrently)
+_scratch = threading.local()
+
+def _scratch_buffer(width, height):
+    """Return this thread's reusable (height, width, 3) uint8 buffer"""
+    buffer = getattr(_scratch, "buffer", None)
+    if buffer is None or buffer.shape != (height, width, 3):
+        buffer = _scratch.buffer = np.empty((height, width, 3), dtype=np.uint8)
+    return buffer
+
+def generate_gradient_background(width, height, color1=None, color2=None, style="vertical", out=None):
+    """
+    Generate a gradient background with various style options
+    
+    Args:
+        width: Image width
+        height: Image height
+        color1: Start color (random dark color if None)
+        color2: End color (random light color if None)
+        style: "vertical", "horizontal" or "radial"
+        out: Optional (height, width, 3) uint8 array to render into instead of allocating;
+            the returned image holds its own copy, so the array can be reused straight away
+    """
     if color1 is None:
         color1 = (
             random.randint(0, 100), 
@@ -32,24 +97,22 @@ def generate_gradient_background(width, height, color1=None, color2=None, style=
             random.randint(150, 255)
         )
         
-    # Create gradient array
-    gradient = np.zeros((height, width, 3), dtype=np.uint8)
+    # Create gradient array (every style below overwrites all pixels)
+    gradient = out if out is not None else np.empty((height, width, 3), dtype=np.uint8)
+    
+    # Colors as arrays so each ramp is a single broadcast expression
+    c1 = np.asarray(color1, dtype=np.float32)
+    c2 = np.asarray(color2, dtype=np.float32)
     
     if style == "vertical":
-        # Standard vertical gradient
-        for y in range(height):
-            r = color1[0] + (color2[0] - color1[0]) * y / height
-            g = color1[1] + (color2[1] - color1[1]) * y / height
-            b = color1[2] + (color2[2] - color1[2]) * y / height
-            gradient[y,:] = [r, g, b]
+        # Standard vertical gradient: one color per row, broadcast across the columns
+        t = (np.arange(height, dtype=np.float32) / height).reshape(height, 1, 1)
+        gradient[:] = (c1 + (c2 - c1) * t).astype(np.uint8)
             
     elif style == "horizontal":
-        # Horizontal gradient
-        for x in range(width):
-            r = color1[0] + (color2[0] - color1[0]) * x / width
-            g = color1[1] + (color2[1] - color1[1]) * x / width
-            b = color1[2] + (color2[2] - color1[2]) * x / width
-            gradient[:,x] = [r, g, b]
+        # Horizontal gradient: one color per column, broadcast down the rows
+        t = (np.arange(width, dtype=np.float32) / width).reshape(1, width, 1)
+        gradient[:] = (c1 + (c2 - c1) * t).astype(np.uint8)
             
     elif style == "radial":
         # Radial gradient
@@ -57,134 +120,164 @@ def generate_gradient_background(width, height, color1=None, color2=None, style=
         center_y = height // 2
         max_dist = math.sqrt(center_x**2 + center_y**2)
         
-        for y in range(height):
-            for x in range(width):
-                dist = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                ratio = min(dist / max_dist, 1.0)
-                
-                r = color1[0] + (color2[0] - color1[0]) * ratio
-                g = color1[1] + (color2[1] - color1[1]) * ratio
-                b = color1[2] + (color2[2] - color1[2]) * ratio
-                gradient[y, x] = [r, g, b]
+        if NUMBA_AVAILABLE and width * height >= RADIAL_JIT_MIN_PIXELS:
+            # Large images: fused multi-core kernel writing straight into the output
+            _radial_gradient_kernel(gradient, c1, c2, center_x, center_y, max_dist)
+        else:
+            # Squared offsets computed once per column and once per row, then broadcast to 2D
+            dx2 = np.square(np.arange(width, dtype=np.float32) - center_x)[None, :]
+            dy2 = np.square(np.arange(height, dtype=np.float32) - center_y)[:, None]
+            ratio = np.sqrt(dx2 + dy2)
+            ratio *= np.float32(1.0 / max_dist)
+            np.minimum(ratio, 1.0, out=ratio)
+            gradient[:] = (c1 + (c2 - c1) * ratio[..., None]).astype(np.uint8)
+    
+    else:
+        # Unknown style: plain black background
+        gradient.fill(0)
     
     # Convert to PIL Image
     return Image.fromarray(gradient)
 
-def get_tone_colors(tone):
-    """Get color palette based on scene tone"""
-    tone_palettes = {
-        "mysterious": {
-            "bg": [(20, 0, 40), (60, 30, 110)],
-            "fg": [(120, 0, 200), (200, 150, 255), (80, 30, 80)],
-            "accent": [(0, 200, 255), (255, 50, 200)]
-        },
-        "joyful": {
-            "bg": [(100, 200, 255), (200, 255, 220)],
-            "fg": [(255, 200, 0), (255, 150, 0), (0, 180, 120)],
-            "accent": [(255, 100, 100), (255, 50, 50)]
-        },
-        "somber": {
-            "bg": [(50, 50, 70), (80, 80, 120)],
-            "fg": [(130, 130, 180), (70, 70, 70), (120, 120, 170)],
-            "accent": [(200, 200, 255), (150, 120, 200)]
-        },
-        "tense": {
-            "bg": [(70, 10, 10), (150, 30, 30)],
-            "fg": [(200, 50, 30), (100, 0, 0), (150, 50, 50)],
-            "accent": [(255, 200, 50), (255, 150, 0)]
-        },
-        "romantic": {
-            "bg": [(150, 50, 100), (255, 200, 220)],
-            "fg": [(255, 150, 150), (200, 100, 150), (255, 200, 180)],
-            "accent": [(255, 220, 200), (255, 150, 200)]
-        },
-        "adventurous": {
-            "bg": [(0, 50, 0), (100, 150, 100)],
-            "fg": [(150, 200, 50), (200, 180, 0), (120, 100, 0)],
-            "accent": [(255, 200, 0), (200, 255, 100)]
-        },
-        "dramatic": {
-            "bg": [(20, 0, 40), (80, 10, 30)],
-            "fg": [(150, 0, 0), (50, 0, 100), (100, 50, 50)],
-            "accent": [(255, 200, 0), (200, 0, 0)]
-        },
-        "peaceful": {
-            "bg": [(50, 100, 200), (200, 240, 255)],
-            "fg": [(100, 200, 255), (150, 200, 200), (100, 180, 200)],
-            "accent": [(255, 255, 200), (200, 255, 255)]
-        }
+# Evenly spaced points on the unit circle for ray fans and regular polygons, keyed by point count
+UNIT_CIRCLE = {
+    n: (np.cos(2 * np.pi * np.arange(n) / n), np.sin(2 * np.pi * np.arange(n) / n))
+    for n in range(3, 12)
+}
+
+# Background, foreground and accent colors for each scene tone
+TONE_PALETTES = {
+    "mysterious": {
+        "bg": [(20, 0, 40), (60, 30, 110)],
+        "fg": [(120, 0, 200), (200, 150, 255), (80, 30, 80)],
+        "accent": [(0, 200, 255), (255, 50, 200)]
+    },
+    "joyful": {
+        "bg": [(100, 200, 255), (200, 255, 220)],
+        "fg": [(255, 200, 0), (255, 150, 0), (0, 180, 120)],
+        "accent": [(255, 100, 100), (255, 50, 50)]
+    },
+    "somber": {
+        "bg": [(50, 50, 70), (80, 80, 120)],
+        "fg": [(130, 130, 180), (70, 70, 70), (120, 120, 170)],
+        "accent": [(200, 200, 255), (150, 120, 200)]
+    },
+    "tense": {
+        "bg": [(70, 10, 10), (150, 30, 30)],
+        "fg": [(200, 50, 30), (100, 0, 0), (150, 50, 50)],
+        "accent": [(255, 200, 50), (255, 150, 0)]
+    },
+    "romantic": {
+        "bg": [(150, 50, 100), (255, 200, 220)],
+        "fg": [(255, 150, 150), (200, 100, 150), (255, 200, 180)],
+        "accent": [(255, 220, 200), (255, 150, 200)]
+    },
+    "adventurous": {
+        "bg": [(0, 50, 0), (100, 150, 100)],
+        "fg": [(150, 200, 50), (200, 180, 0), (120, 100, 0)],
+        "accent": [(255, 200, 0), (200, 255, 100)]
+    },
+    "dramatic": {
+        "bg": [(20, 0, 40), (80, 10, 30)],
+        "fg": [(150, 0, 0), (50, 0, 100), (100, 50, 50)],
+        "accent": [(255, 200, 0), (200, 0, 0)]
+    },
+    "peaceful": {
+        "bg": [(50, 100, 200), (200, 240, 255)],
+        "fg": [(100, 200, 255), (150, 200, 200), (100, 180, 200)],
+        "accent": [(255, 255, 200), (200, 255, 255)]
     }
-    
+}
+
+# Tones recognised in image prompts, in priority order (same as the palette table)
+TONE_KEYWORDS = tuple(TONE_PALETTES)
+
+# Contrast boost for placeholders, applied to the palette colors rather than as a
+# full-image pass after drawing
+PLACEHOLDER_CONTRAST = 1.2
+
+def _boost_contrast(color, factor=PLACEHOLDER_CONTRAST):
+    """Stretch a color away from mid-gray, clamped to the valid range"""
+    return tuple(min(255, max(0, int((channel - 128) * factor + 128))) for channel in color)
+
+# Palettes as drawn on placeholders, with the contrast boost already applied
+_PLACEHOLDER_PALETTES = {
+    tone: {role: [_boost_contrast(color) for color in palette_colors] for role, palette_colors in palette.items()}
+    for tone, palette in TONE_PALETTES.items()
+}
+
+def get_tone_colors(tone):
+    """Get color palette based on scene tone (contrast-boosted for placeholder drawing)"""
     # Default to mysterious if tone not found
-    return tone_palettes.get(tone.lower(), tone_palettes["mysterious"])
+    return _PLACEHOLDER_PALETTES.get(tone.lower(), _PLACEHOLDER_PALETTES["mysterious"])
 
-def draw_character_silhouette(draw, x, y, width, height, posture="standing"):
-    """Draw a character silhouette with various poses"""
+def _draw_silhouette_shapes(draw, x, y, width, height, posture, fill):
+    """Draw the shapes of a character silhouette with its feet anchored at (x, y)"""
     if posture == "standing":
         # Head
         head_radius = int(width * 0.1)
         head_y = y - height + int(height * 0.15)
         draw.ellipse((x - head_radius, head_y - head_radius, 
-                     x + head_radius, head_y + head_radius), fill=(0, 0, 0))
+                     x + head_radius, head_y + head_radius), fill=fill)
         
         # Body
         body_width = int(width * 0.2)
         body_height = int(height * 0.45)
         body_y = head_y + head_radius
         draw.rectangle((x - body_width//2, body_y, 
-                       x + body_width//2, body_y + body_height), fill=(0, 0, 0))
+                       x + body_width//2, body_y + body_height), fill=fill)
         
         # Legs
         leg_width = int(width * 0.08)
         leg_height = int(height * 0.4)
         leg_y = body_y + body_height
         draw.rectangle((x - body_width//2, leg_y, 
-                       x - body_width//2 + leg_width, leg_y + leg_height), fill=(0, 0, 0))
+                       x - body_width//2 + leg_width, leg_y + leg_height), fill=fill)
         draw.rectangle((x + body_width//2 - leg_width, leg_y, 
-                       x + body_width//2, leg_y + leg_height), fill=(0, 0, 0))
+                       x + body_width//2, leg_y + leg_height), fill=fill)
         
         # Arms
         arm_width = int(width * 0.08)
         arm_height = int(height * 0.3)
         arm_y = body_y + int(body_height * 0.1)
         draw.rectangle((x - body_width//2 - arm_width, arm_y, 
-                       x - body_width//2, arm_y + arm_height), fill=(0, 0, 0))
+                       x - body_width//2, arm_y + arm_height), fill=fill)
         draw.rectangle((x + body_width//2, arm_y, 
-                       x + body_width//2 + arm_width, arm_y + arm_height), fill=(0, 0, 0))
+                       x + body_width//2 + arm_width, arm_y + arm_height), fill=fill)
     
     elif posture == "sitting":
         # Head
         head_radius = int(width * 0.1)
         head_y = y - int(height * 0.6)
         draw.ellipse((x - head_radius, head_y - head_radius, 
-                     x + head_radius, head_y + head_radius), fill=(0, 0, 0))
+                     x + head_radius, head_y + head_radius), fill=fill)
         
         # Body
         body_width = int(width * 0.2)
         body_height = int(height * 0.3)
         body_y = head_y + head_radius
         draw.rectangle((x - body_width//2, body_y, 
-                       x + body_width//2, body_y + body_height), fill=(0, 0, 0))
+                       x + body_width//2, body_y + body_height), fill=fill)
         
         # Legs
         leg_width = int(width * 0.08)
         leg_height = int(height * 0.2)
         leg_y = body_y + body_height
         draw.rectangle((x - body_width//2, leg_y, 
-                       x - body_width//2 + leg_width, leg_y + leg_height/2), fill=(0, 0, 0))
+                       x - body_width//2 + leg_width, leg_y + leg_height/2), fill=fill)
         draw.rectangle((x + body_width//2 - leg_width, leg_y, 
-                       x + body_width//2, leg_y + leg_height/2), fill=(0, 0, 0))
+                       x + body_width//2, leg_y + leg_height/2), fill=fill)
         
         # Extended legs
         draw.rectangle((x - body_width//2 + leg_width//2, leg_y + leg_height/2, 
-                        x + body_width//2 - leg_width//2, leg_y + leg_height), fill=(0, 0, 0))
+                        x + body_width//2 - leg_width//2, leg_y + leg_height), fill=fill)
     
     elif posture == "action":
         # Head
         head_radius = int(width * 0.1)
         head_y = y - height + int(height * 0.15)
         draw.ellipse((x - head_radius, head_y - head_radius, 
-                     x + head_radius, head_y + head_radius), fill=(0, 0, 0))
+                     x + head_radius, head_y + head_radius), fill=fill)
         
         # Body (tilted)
         body_width = int(width * 0.2)
@@ -194,7 +287,7 @@ def draw_character_silhouette(draw, x, y, width, height, posture="standing"):
         draw.polygon([(x - body_width//2, body_y), 
                       (x + body_width//2, body_y - body_height//4),
                       (x + body_width//2, body_y + body_height - body_height//4),
-                      (x - body_width//2, body_y + body_height)], fill=(0, 0, 0))
+                      (x - body_width//2, body_y + body_height)], fill=fill)
         
         # Legs in action pose
         leg_width = int(width * 0.08)
@@ -202,10 +295,10 @@ def draw_character_silhouette(draw, x, y, width, height, posture="standing"):
         leg_y = body_y + body_height
         draw.polygon([(x - body_width//2, leg_y), 
                       (x - body_width//2 - leg_width, leg_y + leg_height),
-                      (x - body_width//2 + leg_width, leg_y + leg_height)], fill=(0, 0, 0))
+                      (x - body_width//2 + leg_width, leg_y + leg_height)], fill=fill)
         draw.polygon([(x + body_width//2, leg_y - body_height//4), 
                       (x + body_width//2 + leg_width, leg_y + leg_height//2),
-                      (x + body_width//2 - leg_width, leg_y + leg_height//2)], fill=(0, 0, 0))
+                      (x + body_width//2 - leg_width, leg_y + leg_height//2)], fill=fill)
         
         # Arms in action
         arm_width = int(width * 0.08)
@@ -213,13 +306,35 @@ def draw_character_silhouette(draw, x, y, width, height, posture="standing"):
         arm_y = body_y + int(body_height * 0.1)
         draw.polygon([(x - body_width//2, arm_y), 
                       (x - body_width//2 - arm_width, arm_y - arm_height//2),
-                      (x - body_width//2 - arm_width//2, arm_y + arm_height//2)], fill=(0, 0, 0))
+                      (x - body_width//2 - arm_width//2, arm_y + arm_height//2)], fill=fill)
         draw.polygon([(x + body_width//2, arm_y - body_height//4), 
                       (x + body_width//2 + arm_width, arm_y + arm_height),
-                      (x + body_width//2 + arm_width//2, arm_y - arm_height//3)], fill=(0, 0, 0))
+                      (x + body_width//2 + arm_width//2, arm_y - arm_height//3)], fill=fill)
 
-def draw_scene_element(draw, x, y, size, type_name, color):
-    """Draw various scene elements based on type"""
+@lru_cache(maxsize=32)
+def _render_silhouette(posture, width, height):
+    """
+    Render a silhouette mask once per pose and size
+    
+    Returns:
+        Tuple of (mask image, anchor point of the feet inside the mask)
+    """
+    # The pose shapes stay within half a width sideways and a quarter width below the feet
+    anchor = (width // 2, height + width // 4)
+    mask = Image.new("L", (width, height + width // 2), 0)
+    _draw_silhouette_shapes(ImageDraw.Draw(mask), anchor[0], anchor[1], width, height, posture, fill=255)
+    return mask, anchor
+
+def draw_character_silhouette(img, x, y, width, height, posture="standing"):
+    """Draw a character silhouette with various poses by pasting a cached mask"""
+    mask, (anchor_x, anchor_y) = _render_silhouette(posture, width, height)
+    img.paste((0, 0, 0), (x - anchor_x, y - anchor_y, x - anchor_x + mask.width, y - anchor_y + mask.height), mask)
+
+def draw_scene_element(draw, x, y, size, type_name, color, rng=None):
+    """Draw various scene elements based on type, taking random values from rng"""
+    if rng is None:
+        rng = np.random.default_rng()
+    
     if type_name == "tree":
         # Tree trunk
         trunk_width = int(size * 0.2)
@@ -268,14 +383,15 @@ def draw_scene_element(draw, x, y, size, type_name, color):
                      fill=(240, 240, 255))
     
     elif type_name == "clouds":
-        # Cloud puffs
-        cloud_parts = random.randint(3, 5)
-        for i in range(cloud_parts):
+        # Cloud puffs (offsets and sizes drawn in one batch, bounds inclusive)
+        cloud_parts = int(rng.integers(3, 6))
+        puff_offsets = rng.integers(0, size//4 + 1, cloud_parts).tolist()
+        puff_radii = (rng.integers(int(size * 0.3), int(size * 0.5) + 1, cloud_parts) // 2).tolist()
+        for i, (puff_offset, radius) in enumerate(zip(puff_offsets, puff_radii)):
             puff_x = x + (i - cloud_parts//2) * (size//3)
-            puff_y = y - random.randint(0, size//4)
-            puff_size = random.randint(int(size * 0.3), int(size * 0.5))
-            draw.ellipse((puff_x - puff_size//2, puff_y - puff_size//2,
-                          puff_x + puff_size//2, puff_y + puff_size//2), fill=color)
+            puff_y = y - puff_offset
+            draw.ellipse((puff_x - radius, puff_y - radius,
+                          puff_x + radius, puff_y + radius), fill=color)
     
     elif type_name == "water":
         # Water surface
@@ -284,25 +400,25 @@ def draw_scene_element(draw, x, y, size, type_name, color):
         draw.rectangle((x - water_width//2, y - water_height, 
                         x + water_width//2, y), fill=color)
         
-        # Waves
-        wave_color = (color[0] + 30 if color[0] + 30 < 256 else 255,
-                      color[1] + 30 if color[1] + 30 < 256 else 255,
-                      color[2] + 30 if color[2] + 30 < 256 else 255)
+        # Waves (a lighter shade of the water on three evenly spaced rows)
+        wave_color = tuple(min(channel + 30, 255) for channel in color)
+        wave_left, wave_right = x - water_width//2, x + water_width//2
+        
+        wave_spacing = water_height // 3
         
         for i in range(3):
-            wave_y = y - water_height + i * (water_height // 3)
-            draw.line((x - water_width//2, wave_y, x + water_width//2, wave_y), 
-                      fill=wave_color, width=2)
+            wave_y = y - water_height + i * wave_spacing
+            draw.line((wave_left, wave_y, wave_right, wave_y), fill=wave_color, width=2)
     
     elif type_name == "light_ray":
         # Light rays
-        num_rays = random.randint(5, 8)
+        num_rays = int(rng.integers(5, 9))
         ray_length = size
         
-        for i in range(num_rays):
-            angle = 2 * math.pi * i / num_rays
-            end_x = x + int(ray_length * math.cos(angle))
-            end_y = y + int(ray_length * math.sin(angle))
+        cos_table, sin_table = UNIT_CIRCLE[num_rays]
+        end_xs = (x + (ray_length * cos_table).astype(int)).tolist()
+        end_ys = (y + (ray_length * sin_table).astype(int)).tolist()
+        for end_x, end_y in zip(end_xs, end_ys):
             draw.line((x, y, end_x, end_y), fill=color, width=3)
     
     elif type_name == "portal":
@@ -318,7 +434,7 @@ def draw_scene_element(draw, x, y, size, type_name, color):
                      x + inner_radius, y + inner_radius), fill=inner_color)
     
     else:  # Default to a geometric shape
-        shape_type = random.choice(["circle", "rectangle", "triangle"])
+        shape_type = rng.choice(["circle", "rectangle", "triangle"])
         
         if shape_type == "circle":
             draw.ellipse((x - size//2, y - size//2, x + size//2, y + size//2), fill=color)
@@ -327,59 +443,58 @@ def draw_scene_element(draw, x, y, size, type_name, color):
         else:  # triangle
             draw.polygon([(x, y - size//2), (x - size//2, y + size//2), (x + size//2, y + size//2)], fill=color)
 
-def draw_setting(draw, img_width, img_height, setting_type, colors):
-    """Draw scene setting elements based on type"""
+def draw_setting(draw, img_width, img_height, setting_type, colors, rng=None):
+    """Draw scene setting elements based on type, taking random values from rng"""
+    if rng is None:
+        rng = np.random.default_rng()
+    
     if "exterior" in setting_type.lower():
-        # Sky
-        bg_style = random.choice(["vertical", "horizontal", "radial"])
-        # Draw sky/background elements
-        
         # Ground/horizon
-        horizon_y = int(img_height * random.uniform(0.5, 0.7))
+        horizon_y = int(img_height * rng.uniform(0.5, 0.7))
         draw.rectangle((0, horizon_y, img_width, img_height), fill=colors["fg"][0])
         
-        # Sun/Moon
-        if random.random() > 0.5:
+        # Sun/Moon (position and size drawn together; upper bounds inclusive)
+        if rng.random() > 0.5:
             # Sun
-            sun_x = random.randint(img_width//4, 3*img_width//4)
-            sun_y = random.randint(img_height//5, horizon_y - img_height//5)
-            sun_size = random.randint(img_width//10, img_width//6)
+            sun_x, sun_y, sun_size = rng.integers(
+                (img_width//4, img_height//5, img_width//10),
+                (3*img_width//4 + 1, horizon_y - img_height//5 + 1, img_width//6 + 1)
+            ).tolist()
             draw.ellipse((sun_x - sun_size//2, sun_y - sun_size//2,
                          sun_x + sun_size//2, sun_y + sun_size//2), fill=colors["accent"][0])
             
             # Light rays
-            draw_scene_element(draw, sun_x, sun_y, sun_size*2, "light_ray", colors["accent"][0])
+            draw_scene_element(draw, sun_x, sun_y, sun_size*2, "light_ray", colors["accent"][0], rng)
         else:
             # Moon
-            moon_x = random.randint(img_width//4, 3*img_width//4)
-            moon_y = random.randint(img_height//5, horizon_y - img_height//5)
-            moon_size = random.randint(img_width//12, img_width//8)
+            moon_x, moon_y, moon_size = rng.integers(
+                (img_width//4, img_height//5, img_width//12),
+                (3*img_width//4 + 1, horizon_y - img_height//5 + 1, img_width//8 + 1)
+            ).tolist()
             draw.ellipse((moon_x - moon_size//2, moon_y - moon_size//2,
                          moon_x + moon_size//2, moon_y + moon_size//2), fill=colors["accent"][1])
         
         # Background mountains or buildings
-        for i in range(3):
-            element_x = random.randint(img_width//6, 5*img_width//6)
-            element_size = random.randint(img_width//5, img_width//3)
-            if "mountain" in setting_type.lower() or "forest" in setting_type.lower() or "nature" in setting_type.lower():
-                draw_scene_element(draw, element_x, horizon_y, element_size, "mountain", colors["fg"][i % len(colors["fg"])])
-            else:
-                draw_scene_element(draw, element_x, horizon_y, element_size, "building", colors["fg"][i % len(colors["fg"])])
+        background_type = "mountain" if any(term in setting_type.lower() for term in ["mountain", "forest", "nature"]) else "building"
+        element_xs = rng.integers(img_width//6, 5*img_width//6 + 1, 3).tolist()
+        element_sizes = rng.integers(img_width//5, img_width//3 + 1, 3).tolist()
+        for i, (element_x, element_size) in enumerate(zip(element_xs, element_sizes)):
+            draw_scene_element(draw, element_x, horizon_y, element_size, background_type, colors["fg"][i % len(colors["fg"])], rng)
         
         # Trees or other foreground elements
-        for i in range(5):
-            element_x = random.randint(img_width//8, 7*img_width//8)
-            element_y = random.randint(horizon_y, img_height)
-            element_size = random.randint(img_height//6, img_height//4)
-            if "forest" in setting_type.lower() or "nature" in setting_type.lower():
-                draw_scene_element(draw, element_x, element_y, element_size, "tree", colors["fg"][i % len(colors["fg"])])
+        if "forest" in setting_type.lower() or "nature" in setting_type.lower():
+            element_xs = rng.integers(img_width//8, 7*img_width//8 + 1, 5).tolist()
+            element_ys = rng.integers(horizon_y, img_height + 1, 5).tolist()
+            element_sizes = rng.integers(img_height//6, img_height//4 + 1, 5).tolist()
+            for i, (element_x, element_y, element_size) in enumerate(zip(element_xs, element_ys, element_sizes)):
+                draw_scene_element(draw, element_x, element_y, element_size, "tree", colors["fg"][i % len(colors["fg"])], rng)
             
         # Clouds
-        for i in range(3):
-            cloud_x = random.randint(img_width//8, 7*img_width//8)
-            cloud_y = random.randint(img_height//8, horizon_y//2)
-            cloud_size = random.randint(img_width//10, img_width//6)
-            draw_scene_element(draw, cloud_x, cloud_y, cloud_size, "clouds", (240, 240, 255))
+        cloud_xs = rng.integers(img_width//8, 7*img_width//8 + 1, 3).tolist()
+        cloud_ys = rng.integers(img_height//8, horizon_y//2 + 1, 3).tolist()
+        cloud_sizes = rng.integers(img_width//10, img_width//6 + 1, 3).tolist()
+        for cloud_x, cloud_y, cloud_size in zip(cloud_xs, cloud_ys, cloud_sizes):
+            draw_scene_element(draw, cloud_x, cloud_y, cloud_size, "clouds", (240, 240, 255), rng)
             
     elif "interior" in setting_type.lower():
         # Floor
@@ -390,11 +505,11 @@ def draw_setting(draw, img_width, img_height, setting_type, colors):
         draw.rectangle((0, 0, img_width, floor_y), fill=colors["bg"][1])
         
         # Window or picture
-        element_x = random.randint(img_width//4, 3*img_width//4)
+        element_x = int(rng.integers(img_width//4, 3*img_width//4 + 1))
         element_y = int(floor_y * 0.5)
         element_size = min(img_width//4, floor_y//2)
         
-        if "window" in setting_type.lower() or random.random() > 0.5:
+        if "window" in setting_type.lower() or rng.random() > 0.5:
             # Window
             window_width = element_size
             window_height = int(element_size * 1.5)
@@ -432,79 +547,90 @@ def draw_setting(draw, img_width, img_height, setting_type, colors):
         
         # Background glow
         draw_scene_element(draw, img_width//2, img_height//2, max(img_width, img_height), 
-                          "light_ray", colors["accent"][0])
+                          "light_ray", colors["accent"][0], rng)
         
         # Portal
         portal_size = min(img_width, img_height) // 2
-        draw_scene_element(draw, img_width//2, img_height//2, portal_size, "portal", colors["accent"][1])
-        
-        # Energy particles/stars
-        for i in range(20):
-            particle_x = random.randint(0, img_width)
-            particle_y = random.randint(0, img_height)
-            particle_size = random.randint(5, 15)
-            draw.ellipse((particle_x - particle_size//2, particle_y - particle_size//2,
-                         particle_x + particle_size//2, particle_y + particle_size//2), 
-                         fill=random.choice(colors["fg"]))
+        draw_scene_element(draw, img_width//2, img_height//2, portal_size, "portal", colors["accent"][1], rng)
+        
+        # Energy particles/stars (all random values drawn in one batch, bounds inclusive)
+        num_particles = 20
+        particle_xs = rng.integers(0, img_width + 1, num_particles).tolist()
+        particle_ys = rng.integers(0, img_height + 1, num_particles).tolist()
+        particle_radii = (rng.integers(5, 16, num_particles) // 2).tolist()
+        particle_colors = rng.integers(0, len(colors["fg"]), num_particles).tolist()
+        for particle_x, particle_y, radius, color_index in zip(particle_xs, particle_ys, particle_radii, particle_colors):
+            draw.ellipse((particle_x - radius, particle_y - radius,
+                         particle_x + radius, particle_y + radius), 
+                         fill=colors["fg"][color_index])
     
     else:  # Generic abstract setting
-        # Abstract background with geometric shapes
-        for i in range(15):
-            shape_x = random.randint(0, img_width)
-            shape_y = random.randint(0, img_height)
-            shape_size = random.randint(img_width//20, img_width//8)
-            draw_scene_element(draw, shape_x, shape_y, shape_size, "circle", random.choice(colors["fg"]))
+        # Abstract background with geometric shapes (random values drawn in one batch)
+        num_shapes = 15
+        shape_xs = rng.integers(0, img_width + 1, num_shapes).tolist()
+        shape_ys = rng.integers(0, img_height + 1, num_shapes).tolist()
+        shape_sizes = rng.integers(img_width//20, img_width//8 + 1, num_shapes).tolist()
+        shape_colors = rng.integers(0, len(colors["fg"]), num_shapes).tolist()
+        for shape_x, shape_y, shape_size, color_index in zip(shape_xs, shape_ys, shape_sizes, shape_colors):
+            draw_scene_element(draw, shape_x, shape_y, shape_size, "circle", colors["fg"][color_index], rng)
+
+# Scene description keywords, one case-insensitive pattern per category (substring matches)
+EXTERIOR_PATTERN = re.compile(r"exterior|outside|outdoor|nature|forest|mountain|field|landscape", re.IGNORECASE)
+MAGICAL_PATTERN = re.compile(r"magical|fantasy|mystical|ethereal|otherworldly", re.IGNORECASE)
+ACTION_PATTERN = re.compile(r"action|running|fight|battle|moving", re.IGNORECASE)
+SITTING_PATTERN = re.compile(r"sitting|seated|resting", re.IGNORECASE)
+NO_CHARACTER_PATTERN = re.compile(r"landscape|empty|deserted|abandoned|still life", re.IGNORECASE)
 
 def analyze_scene_type(description):
     """Analyze scene description to extract setting and character info"""
-    description_lower = description.lower()
-    
     # Default values
     setting_type = "interior"
     character_pose = "standing"
     has_character = True
     
     # Determine setting
-    if any(term in description_lower for term in ["exterior", "outside", "outdoor", "nature", "forest", "mountain", "field", "landscape"]):
+    if EXTERIOR_PATTERN.search(description):
         setting_type = "exterior"
-    elif any(term in description_lower for term in ["magical", "fantasy", "mystical", "ethereal", "otherworldly"]):
+    elif MAGICAL_PATTERN.search(description):
         setting_type = "magical"
     
     # Determine character pose
-    if any(term in description_lower for term in ["action", "running", "fight", "battle", "moving"]):
+    if ACTION_PATTERN.search(description):
         character_pose = "action"
-    elif any(term in description_lower for term in ["sitting", "seated", "resting"]):
+    elif SITTING_PATTERN.search(description):
         character_pose = "sitting"
         
     # Check if scene likely has a character
-    if any(term in description_lower for term in ["landscape", "empty", "deserted", "abandoned", "still life"]):
+    if NO_CHARACTER_PATTERN.search(description):
         has_character = False
         
     return setting_type, character_pose, has_character
 
-def generate_visual_element(draw, img_width, img_height, x, y, size, color):
+def generate_visual_element(draw, img_width, img_height, x, y, size, color, rng=None):
     """Generate a random visual element (circle, square, star, etc.)"""
-    shape_type = random.choice(["circle", "rectangle", "polygon"])
+    if rng is None:
+        rng = np.random.default_rng()
+    
+    shape_type = rng.choice(["circle", "rectangle", "polygon"])
     
     if shape_type == "circle":
-        radius = random.randint(size // 4, size // 2)
+        radius = int(rng.integers(size // 4, size // 2 + 1))
         draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
     elif shape_type == "rectangle":
-        width = random.randint(size // 3, size // 2)
-        height = random.randint(size // 3, size // 2)
+        width, height = rng.integers(size // 3, size // 2 + 1, 2).tolist()
         draw.rectangle((x - width, y - height, x + width, y + height), fill=color)
     elif shape_type == "polygon":
-        points = []
-        sides = random.randint(3, 6)  # Triangle to hexagon
-        for i in range(sides):
-            angle = 2 * 3.14159 * i / sides
-            px = x + int(size/2 * np.cos(angle))
-            py = y + int(size/2 * np.sin(angle))
-            points.append((px, py))
-        draw.polygon(points, fill=color)
-
-def create_scene_elements(draw, img_width, img_height, scene_type, tone):
-    """Create visual elements based on scene type and tone"""
+        sides = int(rng.integers(3, 7))  # Triangle to hexagon
+        cos_table, sin_table = UNIT_CIRCLE[sides]
+        xs = (x + (size/2 * cos_table).astype(int)).tolist()
+        ys = (y + (size/2 * sin_table).astype(int)).tolist()
+        draw.polygon(list(zip(xs, ys)), fill=color)
+
+def create_scene_elements(img, img_width, img_height, scene_type, tone, rng=None):
+    """Create visual elements based on scene type and tone, taking random values from rng"""
+    if rng is None:
+        rng = np.random.default_rng()
+    draw = ImageDraw.Draw(img)
     
     # Get colors for this tone
     colors = get_tone_colors(tone)
@@ -513,7 +639,7 @@ def create_scene_elements(draw, img_width, img_height, scene_type, tone):
     setting_type, character_pose, has_character = analyze_scene_type(scene_type)
     
     # Draw appropriate setting
-    draw_setting(draw, img_width, img_height, setting_type, colors)
+    draw_setting(draw, img_width, img_height, setting_type, colors, rng)
     
     # Add character if appropriate
     if has_character:
@@ -529,15 +655,40 @@ def create_scene_elements(draw, img_width, img_height, scene_type, tone):
             character_size = img_width // 3
         
         # Draw character
-        draw_character_silhouette(draw, character_x, character_y, character_size, character_pose)
+        draw_character_silhouette(img, character_x, character_y, character_size, character_size, character_pose)
         
         # For multiple characters
-        if "group" in scene_type.lower() or random.random() > 0.7:
+        if "group" in scene_type.lower() or rng.random() > 0.7:
             second_character_x = 2 * img_width // 3
             second_character_y = img_height - img_height // 6
             second_character_size = img_width // 3
-            draw_character_silhouette(draw, second_character_x, second_character_y, second_character_size, 
-                                     random.choice(["standing", "sitting"]))
+            draw_character_silhouette(img, second_character_x, second_character_y, second_character_size,
+                                     second_character_size, str(rng.choice(["standing", "sitting"])))
+
+def _soften(img):
+    """Apply the placeholder's radius-2 box blur, using OpenCV's SIMD kernel when available"""
+    if CV2_AVAILABLE:
+        return Image.fromarray(cv2.blur(np.asarray(img), (5, 5), borderType=cv2.BORDER_REPLICATE))
+    # Box blur is separable and much cheaper than Gaussian; the softening is equivalent here
+    return img.filter(ImageFilter.BoxBlur(2))
+
+# zlib level for placeholder PNGs (PIL's default of 6 is about twice as slow for little size gain)
+PLACEHOLDER_PNG_COMPRESSION = 3
+
+@lru_cache(maxsize=8)
+def _load_font(size):
+    """Load the title font once per size, falling back to PIL's default font"""
+    try:
+        return ImageFont.truetype("Arial", size)
+    except IOError:
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=8)
+def _render_background(tone, width, height, style):
+    """Render a tone's gradient background once; callers draw on a copy (~4 MB per entry at 1024x1024)"""
+    colors = get_tone_colors(tone)
+    return generate_gradient_background(width, height, colors["bg"][0], colors["bg"][1], style,
+                                        out=_scratch_buffer(width, height))
 
 def generate_placeholder_image(text, output_file, width=1024, height=1024, tone="mysterious"):
     """
@@ -556,30 +707,24 @@ def generate_placeholder_image(text, output_file, width=1024, height=1024, tone=
     # Get color palette for this tone
     colors = get_tone_colors(tone)
     
-    # Create gradient background based on tone
-    gradient_style = random.choice(["vertical", "horizontal", "radial"])
-    img = generate_gradient_background(width, height, colors["bg"][0], colors["bg"][1], gradient_style)
-    draw = ImageDraw.Draw(img)
+    # One generator supplies every random choice made while drawing this image
+    rng = np.random.default_rng()
+    
+    # Create gradient background based on tone (scenes sharing a tone reuse the cached render)
+    gradient_style = str(rng.choice(["vertical", "horizontal", "radial"]))
+    img = _render_background(tone.lower(), width, height, gradient_style).copy()
     
     # Add visual elements based on scene type and tone
-    create_scene_elements(draw, width, height, scene_type, tone)
+    create_scene_elements(img, width, height, scene_type, tone, rng)
     
-    # Apply some filters for effect
-    img = img.filter(ImageFilter.GaussianBlur(radius=2))
-    enhancer = ImageEnhance.Contrast(img)
-    img = enhancer.enhance(1.2)
+    # Apply some filters for effect (contrast is already baked into the palette colors)
+    img = _soften(img)
     
-    # Try to load a font, use default if not available
-    try:
-        font_size = 36
-        title_font_size = 48
-        font = ImageFont.truetype("Arial", font_size)
-        title_font = ImageFont.truetype("Arial", title_font_size)
-    except IOError:
-        font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
+    # Fonts are loaded once per process, default font if Arial is not available
+    title_font = _load_font(48)
     
-    # Add the AI ShortStory Studio title at the top center
+    # Add the AI ShortStory Studio title at the top center (filters return a new image)
+    draw = ImageDraw.Draw(img)
     title = "AI ShortStory Studio"
     title_bbox = draw.textbbox((0, 0), title, font=title_font)
     title_width = title_bbox[2] - title_bbox[0]
@@ -588,8 +733,8 @@ def generate_placeholder_image(text, output_file, width=1024, height=1024, tone=
     # Ensure directory exists
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
-    # Save the image
-    img.save(output_file)
+    # Save the image; flat placeholder art compresses well even at a fast zlib level
+    img.save(output_file, compress_level=PLACEHOLDER_PNG_COMPRESSION)
     print(f"Visual placeholder image saved to {output_file}")
     return output_file
 
@@ -617,13 +762,9 @@ def generate_image(
         # Print status
         print(f"Generating image for prompt: {prompt[:50]}...")
         
-        # Extract tone from prompt
-        tone = "mysterious"  # default
-        tone_keywords = ["mysterious", "joyful", "somber", "tense", "romantic", "adventurous", "dramatic", "peaceful"]
-        for keyword in tone_keywords:
-            if keyword in prompt.lower():
-                tone = keyword
-                break
+        # Extract tone from prompt (first matching keyword, mysterious by default)
+        prompt_lower = prompt.lower()
+        tone = next((keyword for keyword in TONE_KEYWORDS if keyword in prompt_lower), "mysterious")
         
         # Enhance the prompt if needed
         enhanced_prompt = f"{prompt} High quality, detailed, cinematic lighting."
@@ -633,31 +774,34 @@ def generate_image(
         
         # Try to call the OpenAI API
         try:
-            # Call the OpenAI API
-            response = openai.images.generate(
-                model="dall-e-3",
-                prompt=enhanced_prompt,
-                size=size,
-                quality=quality,
-                style=style,
-                n=1
-            )
+            # Call the OpenAI API (throttled, since several scenes are generated at once)
+            with _api_slots:
+                response = openai.images.generate(
+                    model="dall-e-3",
+                    prompt=enhanced_prompt,
+                    size=size,
+                    quality=quality,
+                    style=style,
+                    n=1
+                )
             
             # Get image URL
             image_url = response.data[0].url
             
-            # Download image
-            response = requests.get(image_url)
-            if response.status_code == 200:
-                # Save the image
-                img = Image.open(BytesIO(response.content))
-                img.save(output_file)
-                print(f"Image saved to {output_file}")
-                return output_file
-            else:
-                print(f"Failed to download image: Status code {response.status_code}")
-                # Fall back to placeholder
-                return generate_placeholder_image(prompt, output_file, tone=tone)
+            # Download image; DALL-E already serves a PNG, so the bytes go straight to disk
+            with requests.get(image_url, stream=True) as response:
+                if response.status_code == 200:
+                    # Save the image
+                    with open(output_file, "wb") as f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                    print(f"Image saved to {output_file}")
+                    return output_file
+                else:
+                    print(f"Failed to download image: Status code {response.status_code}")
+            
+            # Fall back to placeholder
+            return generate_placeholder_image(prompt, output_file, tone=tone)
         
         except Exception as api_error:
             print(f"Error with API call: {api_error}")
@@ -672,6 +816,28 @@ def generate_image(
         except:
             return None
         
+def create_thumbnail(image_path, max_size=512, quality=82):
+    """
+    Save a downscaled JPEG copy of an image for grid previews
+    
+    Args:
+        image_path: Path to the full-size image
+        max_size: Longest side of the thumbnail in pixels
+        quality: JPEG quality setting
+        
+    Returns:
+        Path to the thumbnail, or None if it could not be created
+    """
+    thumb_path = os.path.splitext(image_path)[0] + "_thumb.jpg"
+    try:
+        with Image.open(image_path) as img:
+            img.thumbnail((max_size, max_size))
+            img.convert("RGB").save(thumb_path, "JPEG", quality=quality, optimize=True)
+        return thumb_path
+    except Exception as e:
+        print(f"Error creating thumbnail for {image_path}: {e}")
+        return None
+
 def generate_images_for_scenes(scenes, output_dir="outputs/images"):
     """
     Generate images for all scenes in a story
@@ -684,23 +850,35 @@ def generate_images_for_scenes(scenes, output_dir="outputs/images"):
         List of paths to the generated image files
     """
     os.makedirs(output_dir, exist_ok=True)
-    image_paths = []
     
-    for i, scene in enumerate(scenes):
-        # Get the image prompt and tone from the scene
+    def generate_scene_image(i, scene):
+        # Get the image prompt from the scene
         prompt = scene.get("image_prompt", scene.get("description", ""))
-        tone = scene.get("tone", "mysterious")
         
         # Generate the image
         output_file = os.path.join(output_dir, f"scene_{i+1}.png")
         image_path = generate_image(prompt, output_file)
         
         if image_path:
-            image_paths.append(image_path)
-        
-        # Add a small delay between API calls
-        if i < len(scenes) - 1:
-            time.sleep(1)
+            # Small preview for the results page so the full PNG is only sent on request
+            create_thumbnail(image_path)
+        return image_path
+    
+    # Requests are network-bound, so scenes are generated concurrently; generate_image
+    # limits how many API calls are in flight instead of sleeping between scenes
+    with ThreadPoolExecutor(max_workers=min(IMAGE_WORKERS, max(len(scenes), 1))) as executor:
+        futures = [executor.submit(generate_scene_image, i, scene) for i, scene in enumerate(scenes)]
+        
+        # Collect in scene order
+        image_paths = []
+        for future in futures:
+            try:
+                image_path = future.result()
+            except Exception as e:
+                print(f"Error generating scene image: {e}")
+                image_path = None
+            if image_path:
+                image_paths.append(image_path)
             
     return image_paths
 
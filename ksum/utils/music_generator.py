@@ -1,14 +1,25 @@
 import os
+import re
 import time
-import wave
-import math
-import random
+import shutil
+import hashlib
 import struct
-import array
+import tempfile
 import numpy as np
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from collections import Counter
 from pathlib import Path
 from dotenv import load_dotenv
+from utils.workers import cpu_executor
+
+# numba is optional; without it notes are synthesized with NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
@@ -31,207 +42,344 @@ DEFAULT_MUSIC_THEMES = {
 # Path to fallback music samples
 FALLBACK_MUSIC_DIR = Path("outputs/music/fallbacks")
 
-def generate_note(frequency, duration, sample_rate=44100, amplitude=10000, fade=0.1):
-    """Generate a single musical note"""
+# Random source for choosing between fallback files
+_rng = np.random.default_rng()
+
+# Synthesized themes, keyed by theme, duration and sample rate
+MUSIC_CACHE_DIR = Path("outputs/music/cache")
+
+# Base musical frequencies for different scales
+C_MAJOR = [261.63, 293.66, 329.63, 349.23, 392.00, 440.00, 493.88]  # C D E F G A B
+C_MINOR = [261.63, 293.66, 311.13, 349.23, 392.00, 415.30, 466.16]  # C D Eb F G Ab Bb
+C_PENTATONIC = [261.63, 293.66, 329.63, 392.00, 440.00]  # C D E G A
+
+# Musical style per theme: (scale, tempo range in notes per second, pattern,
+# chords as scale degrees). Listed in order of precedence when a theme
+# description matches several of them; "neutral" covers everything else
+THEME_STYLES = {
+    "happy": (C_MAJOR, (2.5, 4.0), "arpeggio", [
+        (0, 2, 4),  # I (C E G)
+        (3, 5, 0),  # IV (F A C)
+        (4, 6, 1),  # V (G B D)
+        (0, 2, 4)   # I (C E G)
+    ]),
+    "sad": (C_MINOR, (1.5, 2.5), "chord", [
+        (0, 2, 4),  # i (C Eb G)
+        (5, 0, 2),  # VI (Ab C Eb)
+        (3, 5, 0),  # iv (F Ab C)
+        (4, 6, 1)   # V (G Bb D)
+    ]),
+    "mysterious": (C_MINOR, (1.0, 2.0), "arpeggio", [
+        (0, 3, 6),  # Diminished (C F Bb)
+        (1, 4, 6),  # (D G Bb)
+        (0, 3, 6),  # Repeat
+        (4, 0, 2)   # (G C Eb)
+    ]),
+    "adventure": (C_MAJOR, (3.0, 4.0), "mixed", [
+        (0, 2, 4),  # I (C E G)
+        (0, 2, 4),  # Repeat
+        (3, 5, 0),  # IV (F A C)
+        (4, 6, 1)   # V (G B D)
+    ]),
+    "neutral": (C_PENTATONIC, (2.0, 3.0), "chord", [  # neutral, ambient, etc.
+        (0, 2, 4),  # (C E A)
+        (1, 3, 0),  # (D G C)
+        (4, 1, 3),  # (A D G)
+        (0, 2, 4)   # (C E A)
+    ])
+}
+
+# Words in a theme description that select each style
+THEME_KEYWORDS = {
+    "happy": ["happy", "cheerful", "uplifting"],
+    "sad": ["sad", "melancholic", "sorrow"],
+    "mysterious": ["mysterious", "dark", "tension", "suspense"],
+    "adventure": ["adventure", "epic", "heroic"]
+}
+
+# Keywords match anywhere in the description, so "suspenseful" counts as "suspense"
+_KEYWORD_THEMES = {word: style for style, words in THEME_KEYWORDS.items() for word in words}
+THEME_KEYWORD_RE = re.compile("|".join(sorted(_KEYWORD_THEMES, key=len, reverse=True)))
+
+# One cycle of a sine wave, shared by every note (size must be a power of two)
+SINE_LUT_SIZE = 4096
+SINE_LUT = np.sin(2 * np.pi * np.arange(SINE_LUT_SIZE) / SINE_LUT_SIZE)
+
+# Fractional bits of the fixed-point phase (in table entries) used to index SINE_LUT
+PHASE_FRACTION_BITS = 32
+
+# Frames synthesized per step, so that the temporaries of all notes stay in cache
+SYNTH_BLOCK_FRAMES = 16384
+
+if NUMBA_AVAILABLE:
+    # Releases the GIL rather than using numba's own threads: the caller already
+    # renders theme sections on a thread pool
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _render_notes_kernel(out, phase_steps, envelope, sine_lut, fraction_bits):
+        """Fill out (notes, frames) from the sine table in one pass, without temporaries"""
+        half = np.int64(1) << (fraction_bits - 1)
+        mask = len(sine_lut) - 1
+        for row in range(out.shape[0]):
+            step = phase_steps[row]
+            for frame in range(out.shape[1]):
+                phase = ((step * frame + half) >> fraction_bits) & mask
+                out[row, frame] = np.int32(sine_lut[phase] * envelope[frame])
+
+@lru_cache(maxsize=32)
+def _fade_envelope(num_frames, fade_frames, amplitude):
+    """
+    Amplitude of each frame of a note with linear fade in/out (on notes shorter
+    than two fades, the fade-in takes precedence). Shared between calls, so the
+    array is read-only
+    """
+    frames = np.arange(num_frames)
+    envelope = np.full(num_frames, float(amplitude))
+    if fade_frames > 0:
+        fade_in_end = min(fade_frames, num_frames)
+        envelope[:fade_in_end] *= frames[:fade_in_end] / fade_frames
+        fade_out_start = max(num_frames - fade_frames + 1, fade_in_end)
+        envelope[fade_out_start:] *= (num_frames - frames[fade_out_start:]) / fade_frames
+    
+    envelope.flags.writeable = False
+    return envelope
+
+def generate_notes(frequencies, duration, sample_rate=44100, amplitude=10000, fade=0.1):
+    """
+    Generate notes of the same length together, as one row per frequency of
+    an int32 NumPy array
+    """
     # Number of frames to generate
     num_frames = int(sample_rate * duration)
     
     # Fade in/out duration in frames
     fade_frames = int(fade * sample_rate)
     
-    # Generate the waveform (sine wave)
-    waveform = []
-    for i in range(num_frames):
-        # Calculate the current time
-        t = i / sample_rate
-        
-        # Basic sine wave
-        sample = amplitude * math.sin(2 * math.pi * frequency * t)
-        
-        # Apply fade in/out
-        if i < fade_frames:
-            # Fade in
-            sample *= i / fade_frames
-        elif i > num_frames - fade_frames:
-            # Fade out
-            sample *= (num_frames - i) / fade_frames
-            
-        # Add the sample
-        waveform.append(int(sample))
+    # Amplitude with fade in/out, shared by every note
+    envelope = _fade_envelope(num_frames, fade_frames, amplitude)
+    
+    # Phases are fixed-point integers (in table entries), so the nearest entry of
+    # the sine table is a shift and the wrap around the table is a bit mask
+    phase_steps = np.rint(
+        np.asarray(frequencies, dtype=np.float64) * (SINE_LUT_SIZE / sample_rate * 2 ** PHASE_FRACTION_BITS)
+    ).astype(np.int64)
+    waveforms = np.empty((len(phase_steps), num_frames), dtype=np.int32)
+    
+    if NUMBA_AVAILABLE:
+        _render_notes_kernel(waveforms, phase_steps, envelope, SINE_LUT, PHASE_FRACTION_BITS)
+        return waveforms
+    
+    # Generate the waveforms (sine waves) of all notes block by block
+    frames = np.arange(num_frames, dtype=np.int64)
+    phase_steps = phase_steps[:, np.newaxis]
+    for start in range(0, num_frames, SYNTH_BLOCK_FRAMES):
+        block = slice(start, start + SYNTH_BLOCK_FRAMES)
+        phase = phase_steps * frames[block]
+        phase += 1 << (PHASE_FRACTION_BITS - 1)  # Round to the nearest entry
+        phase >>= PHASE_FRACTION_BITS
+        phase &= SINE_LUT_SIZE - 1
+        samples = SINE_LUT[phase]
+        samples *= envelope[block]
         
-    return waveform
+        # Assigning to int32 truncates toward zero like int() did per sample
+        waveforms[:, block] = samples
+    
+    return waveforms
+
+def generate_note(frequency, duration, sample_rate=44100, amplitude=10000, fade=0.1):
+    """Generate a single musical note as an int32 NumPy array"""
+    return generate_notes([frequency], duration, sample_rate, amplitude, fade)[0]
+
+def _mix_into(waveform, samples, start_frame=0):
+    """Add samples into waveform from start_frame on, dropping anything past its end"""
+    end_frame = min(start_frame + len(samples), len(waveform))
+    if end_frame > start_frame:
+        waveform[start_frame:end_frame] += samples[:end_frame - start_frame]
 
 def generate_chord(frequencies, duration, sample_rate=44100, amplitude=4000, fade=0.1):
     """Generate a chord from multiple frequencies"""
-    num_frames = int(sample_rate * duration)
-    waveform = [0] * num_frames
-    
-    # Generate each note in the chord
-    for freq in frequencies:
-        note = generate_note(freq, duration, sample_rate, amplitude, fade)
-        
-        # Add the note to the chord
-        for i in range(min(len(note), num_frames)):
-            waveform[i] += note[i]
-    
-    return waveform
+    # All notes of the chord are rendered together and summed
+    return generate_notes(frequencies, duration, sample_rate, amplitude, fade).sum(axis=0, dtype=np.int32)
 
 def generate_arpeggio(frequencies, duration, notes_per_second=4, sample_rate=44100, amplitude=8000):
     """Generate an arpeggio from the given frequencies"""
     note_duration = 1 / notes_per_second
     num_frames = int(sample_rate * duration)
-    waveform = [0] * num_frames
+    waveform = np.zeros(num_frames, dtype=np.int32)
     
     # Calculate how many full arpeggios we can fit
     total_notes = int(duration * notes_per_second)
     
-    # Generate each note in the arpeggio
+    # Every note of the arpeggio has the same length, so render each frequency once
+    notes = generate_notes(frequencies, note_duration * 1.2, sample_rate, amplitude, fade=0.05)
+    
+    # Add each note of the arpeggio to the waveform
     for i in range(total_notes):
-        freq = frequencies[i % len(frequencies)]
         start_frame = int(i * note_duration * sample_rate)
-        note = generate_note(freq, note_duration * 1.2, sample_rate, amplitude, fade=0.05)
-        
-        # Add the note to the waveform
-        for j in range(len(note)):
-            if start_frame + j < num_frames:
-                waveform[start_frame + j] += note[j]
+        _mix_into(waveform, notes[i % len(frequencies)], start_frame)
     
     return waveform
 
-def generate_musical_theme(theme, duration=15.0, sample_rate=44100):
-    """Generate a musical theme based on the theme description"""
-    # Base musical frequencies for different scales
-    c_major = [261.63, 293.66, 329.63, 349.23, 392.00, 440.00, 493.88]  # C D E F G A B
-    c_minor = [261.63, 293.66, 311.13, 349.23, 392.00, 415.30, 466.16]  # C D Eb F G Ab Bb
-    c_pentatonic = [261.63, 293.66, 329.63, 392.00, 440.00]  # C D E G A
-    
-    # Choose scale based on theme
-    theme_lower = theme.lower()
-    if any(word in theme_lower for word in ["happy", "cheerful", "uplifting"]):
-        scale = c_major
-        tempo = random.uniform(2.5, 4.0)  # Notes per second
-        pattern = "arpeggio"
-        chords = [
-            [scale[0], scale[2], scale[4]],  # I (C E G)
-            [scale[3], scale[5], scale[0]],  # IV (F A C)
-            [scale[4], scale[6], scale[1]],  # V (G B D)
-            [scale[0], scale[2], scale[4]]   # I (C E G)
-        ]
-    elif any(word in theme_lower for word in ["sad", "melancholic", "sorrow"]):
-        scale = c_minor
-        tempo = random.uniform(1.5, 2.5)  # Notes per second
-        pattern = "chord"
-        chords = [
-            [scale[0], scale[2], scale[4]],  # i (C Eb G)
-            [scale[5], scale[0], scale[2]],  # VI (Ab C Eb)
-            [scale[3], scale[5], scale[0]],  # iv (F Ab C)
-            [scale[4], scale[6], scale[1]]   # V (G Bb D)
-        ]
-    elif any(word in theme_lower for word in ["mysterious", "dark", "tension", "suspense"]):
-        scale = c_minor
-        tempo = random.uniform(1.0, 2.0)  # Notes per second
-        pattern = "arpeggio"
-        chords = [
-            [scale[0], scale[3], scale[6]],  # Diminished (C F Bb)
-            [scale[1], scale[4], scale[6]],  # (D G Bb)
-            [scale[0], scale[3], scale[6]],  # Repeat
-            [scale[4], scale[0], scale[2]]   # (G C Eb)
-        ]
-    elif any(word in theme_lower for word in ["adventure", "epic", "heroic"]):
-        scale = c_major
-        tempo = random.uniform(3.0, 4.0)  # Notes per second
-        pattern = "mixed"
-        chords = [
-            [scale[0], scale[2], scale[4]],  # I (C E G)
-            [scale[0], scale[2], scale[4]],  # Repeat
-            [scale[3], scale[5], scale[0]],  # IV (F A C)
-            [scale[4], scale[6], scale[1]]   # V (G B D)
-        ]
-    else:  # neutral, ambient, etc.
-        scale = c_pentatonic
-        tempo = random.uniform(2.0, 3.0)  # Notes per second
-        pattern = "chord"
-        chords = [
-            [scale[0], scale[2], scale[4]],  # (C E A)
-            [scale[1], scale[3], scale[0]],  # (D G C)
-            [scale[4], scale[1], scale[3]],  # (A D G)
-            [scale[0], scale[2], scale[4]]   # (C E A)
-        ]
+def render_section(chord, arpeggio_notes, bass_frequency, pattern, tempo, chord_duration, sample_rate=44100):
+    """
+    Render the part of a theme played over one chord
+    
+    Args:
+        chord: NumPy array with the frequencies of the chord
+        arpeggio_notes: NumPy array with the frequencies arpeggiated over the chord
+        bass_frequency: Frequency of the section's bass note
+        pattern: "arpeggio", "chord" or "mixed"
+        tempo: Arpeggio notes per second
+        chord_duration: Length of the section in seconds
+        sample_rate: Sample rate of the waveform
+        
+    Returns:
+        int32 NumPy array with the section's samples
+    """
+    if pattern == "arpeggio":
+        # Arpeggios for a flowing feel
+        section_waveform = generate_arpeggio(arpeggio_notes, chord_duration, tempo, sample_rate)
+        
+        # Add bass notes
+        bass_note = generate_note(bass_frequency, chord_duration, sample_rate, amplitude=5000, fade=0.2)
+        _mix_into(section_waveform, bass_note)
+            
+    elif pattern == "chord":
+        # Sustained chords for emotional themes
+        section_waveform = generate_chord(chord, chord_duration, sample_rate, fade=0.3)
+        
+        # Add rhythmic bass
+        bass_duration = chord_duration / 4
+        bass_note = generate_note(bass_frequency, bass_duration, sample_rate, amplitude=6000, fade=0.1)
+        for i in range(4):
+            start_frame = int(i * bass_duration * sample_rate)
+            _mix_into(section_waveform, bass_note, start_frame)
+    
+    else:  # mixed pattern
+        # Start with a chord
+        chord_sound = generate_chord(chord, chord_duration/2, sample_rate, fade=0.2)
+        
+        # Then do an arpeggio
+        arpeggio_sound = generate_arpeggio(arpeggio_notes, chord_duration/2, tempo, sample_rate)
+        section_waveform = np.concatenate((chord_sound, arpeggio_sound))
+    
+    return section_waveform
+
+def theme_seed(theme, duration):
+    """Stable random seed for a theme, so the same theme always renders the same music"""
+    digest = hashlib.blake2b(f"{theme}|{duration}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def generate_musical_theme(theme, duration=15.0, sample_rate=44100, seed=None):
+    """
+    Generate a musical theme based on the theme description, as int16 samples
+    
+    Random choices (the tempo) are drawn from seed, which defaults to a value
+    derived from the theme and duration so that renderings are reproducible
+    """
+    # Choose scale based on theme; earlier entries in THEME_STYLES win ties
+    matched = {_KEYWORD_THEMES[word] for word in THEME_KEYWORD_RE.findall(theme.lower())}
+    style = next((name for name in THEME_STYLES if name in matched), "neutral")
+    scale, (min_tempo, max_tempo), pattern, chord_degrees = THEME_STYLES[style]
+    
+    rng = np.random.default_rng(theme_seed(theme, duration) if seed is None else seed)
+    tempo = rng.uniform(min_tempo, max_tempo)  # Notes per second
     
     # Adjust octaves for more musical range
     bass_octave = 0.5  # One octave down
     high_octave = 2.0  # One octave up
     
-    # Create a complete musical piece
-    waveform = []
+    # The scale followed by its notes an octave up and an octave down, so
+    # every note of the theme is a lookup by scale degree
+    extended_scale = np.concatenate((scale, np.multiply(scale, high_octave), np.multiply(scale, bass_octave)))
+    degrees = np.asarray(chord_degrees)
+    roots = degrees[:, 0]
+    
+    # Per section: the chord, the arpeggio (the chord plus its root an octave up)
+    # and the bass note (the root an octave down)
+    chords = extended_scale[degrees]
+    arpeggios = extended_scale[np.column_stack((degrees, roots + len(scale)))]
+    bass_frequencies = extended_scale[roots + 2 * len(scale)]
+    
+    # Create a complete musical piece; the sections are independent and NumPy
+    # releases the GIL while rendering them, so they are rendered in parallel on the shared pool
     chord_duration = duration / len(chords)
+    sections = list(cpu_executor().map(
+        lambda chord, arpeggio_notes, bass_frequency: render_section(
+            chord, arpeggio_notes, bass_frequency, pattern, tempo, chord_duration, sample_rate
+        ),
+        chords, arpeggios, bass_frequencies
+    ))
     
-    # Generate different patterns based on the theme
-    for chord in chords:
-        section_waveform = []
-        
-        if pattern == "arpeggio":
-            # Arpeggios for a flowing feel
-            arpeggio_notes = chord + [chord[0] * 2]  # Add root note an octave up
-            section_waveform = generate_arpeggio(arpeggio_notes, chord_duration, tempo)
-            
-            # Add bass notes
-            bass_note = generate_note(chord[0] * bass_octave, chord_duration, amplitude=5000, fade=0.2)
-            for i in range(min(len(bass_note), len(section_waveform))):
-                section_waveform[i] += bass_note[i]
-                
-        elif pattern == "chord":
-            # Sustained chords for emotional themes
-            section_waveform = generate_chord(chord, chord_duration, fade=0.3)
-            
-            # Add rhythmic bass
-            bass_duration = chord_duration / 4
-            for i in range(4):
-                bass_note = generate_note(chord[0] * bass_octave, bass_duration, amplitude=6000, fade=0.1)
-                start_frame = int(i * bass_duration * sample_rate)
-                for j in range(len(bass_note)):
-                    if start_frame + j < len(section_waveform):
-                        section_waveform[start_frame + j] += bass_note[j]
-        
-        else:  # mixed pattern
-            # Start with a chord
-            chord_sound = generate_chord(chord, chord_duration/2, fade=0.2)
-            section_waveform.extend(chord_sound)
-            
-            # Then do an arpeggio
-            arpeggio_notes = chord + [chord[0] * 2]  # Add root note an octave up
-            arpeggio_sound = generate_arpeggio(arpeggio_notes, chord_duration/2, tempo)
-            section_waveform.extend(arpeggio_sound)
-        
-        waveform.extend(section_waveform)
+    waveform = np.concatenate(sections)
     
     # Add some reverb effect (simple delay-based)
-    reverb_waveform = [0] * len(waveform)
     delay_ms = 100  # 100ms delay
     delay_frames = int(delay_ms * sample_rate / 1000)
     decay = 0.6  # Decay factor
     
-    for i in range(len(waveform)):
-        reverb_waveform[i] = waveform[i]
-        if i >= delay_frames:
-            reverb_waveform[i] += int(waveform[i - delay_frames] * decay)
+    # Each sample picks up a decayed copy of the one delay_frames earlier
+    reverb_waveform = waveform.copy()
+    reverb_waveform[delay_frames:] += (waveform[:-delay_frames] * decay).astype(np.int32)
     
     # Normalize waveform to prevent clipping
-    max_amplitude = max(abs(min(reverb_waveform)), abs(max(reverb_waveform)))
+    # Two read-only reductions beat np.abs(), which writes a full temporary first
+    max_amplitude = max(int(reverb_waveform.max()), -int(reverb_waveform.min()))
     if max_amplitude > 0:
         scale_factor = 32000 / max_amplitude  # Scale to near 16-bit max without clipping
-        for i in range(len(reverb_waveform)):
-            reverb_waveform[i] = int(reverb_waveform[i] * scale_factor)
+        np.multiply(reverb_waveform, scale_factor, out=reverb_waveform, casting='unsafe')
     
-    return array.array('h', reverb_waveform)
+    # 16-bit samples, so tobytes() is already the WAV frame data
+    return reverb_waveform.astype(np.int16)
 
 def save_wave_file(waveform, output_file, sample_rate=44100):
-    """Save the waveform as a WAV file"""
-    with wave.open(output_file, 'w') as wav_file:
-        wav_file.setnchannels(1)  # Mono
-        wav_file.setsampwidth(2)  # 16-bit
-        wav_file.setframerate(sample_rate)
-        wav_file.writeframes(waveform.tobytes())
+    """Save the waveform (16-bit samples) as a mono WAV file"""
+    # WAV frames are little-endian int16; for the int16 arrays generate_musical_theme
+    # returns this is a no-op
+    frames = np.ascontiguousarray(waveform, dtype='<i2')
+    data_size = frames.nbytes
+    
+    # Canonical 44-byte PCM header: RIFF chunk, fmt chunk (mono, 16-bit), data chunk
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', data_size
+    )
+    
+    # The samples are written straight from the array buffer
+    with open(output_file, 'wb') as wav_file:
+        wav_file.write(header)
+        wav_file.write(frames)
+
+def render_theme(theme, output_file, duration=15.0, sample_rate=44100):
+    """
+    Synthesize a theme to a WAV file, reusing an earlier rendering from the cache
+    
+    Args:
+        theme: Music theme description
+        output_file: Path to save the music file
+        duration: Length of the theme in seconds
+        sample_rate: Sample rate of the WAV file
+        
+    Returns:
+        Path to the music file
+    """
+    key = hashlib.blake2b(f"{theme}|{duration}|{sample_rate}".encode("utf-8"), digest_size=8).hexdigest()
+    cached_file = MUSIC_CACHE_DIR / f"{key}.wav"
+    
+    if not cached_file.is_file():
+        MUSIC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        waveform = generate_musical_theme(theme, duration=duration, sample_rate=sample_rate)
+        
+        # Write under a unique temporary name so concurrent readers never see a partial
+        # file and concurrent renders of the same theme never share one
+        with tempfile.NamedTemporaryFile(dir=MUSIC_CACHE_DIR, suffix=".tmp", delete=False) as f:
+            temp_file = f.name
+        save_wave_file(waveform, temp_file, sample_rate)
+        os.replace(temp_file, cached_file)
+    
+    shutil.copyfile(cached_file, output_file)
+    return output_file
 
 def generate_music_with_suno(theme, output_file):
     """
@@ -252,8 +400,7 @@ def generate_music_with_suno(theme, output_file):
         print("Note: Suno API implementation is a placeholder")
         
         # Generate music using our internal algorithm instead
-        waveform = generate_musical_theme(theme, duration=15.0)
-        save_wave_file(waveform, output_file)
+        render_theme(theme, output_file)
         
         print(f"Music saved to {output_file}")
         return output_file
@@ -266,17 +413,20 @@ def create_fallback_music_dir():
     """Create directory for fallback music if it doesn't exist"""
     os.makedirs(FALLBACK_MUSIC_DIR, exist_ok=True)
     
-    # Create placeholder files if no files exist
-    if not list(FALLBACK_MUSIC_DIR.glob("*.wav")):
-        for theme, tone in [
+    # Create placeholder files if no files exist, rendering the themes concurrently
+    if not any(FALLBACK_MUSIC_DIR.glob("*.wav")):
+        fallback_themes = [
             ("adventure", "adventure"),
             ("mysterious", "mysterious"),
             ("happy", "happy"),
             ("sad", "sad")
-        ]:
-            placeholder_file = FALLBACK_MUSIC_DIR / f"{theme}.wav"
-            waveform = generate_musical_theme(tone, duration=15.0)
-            save_wave_file(waveform, placeholder_file)
+        ]
+        # (on a pool of their own: each theme waits on its sections in the shared pool)
+        with ThreadPoolExecutor(max_workers=len(fallback_themes)) as executor:
+            list(executor.map(
+                lambda fallback: render_theme(fallback[1], FALLBACK_MUSIC_DIR / f"{fallback[0]}.wav"),
+                fallback_themes
+            ))
                 
 def get_fallback_music(theme, output_file):
     """
@@ -298,10 +448,8 @@ def get_fallback_music(theme, output_file):
         
         if not fallback_files:
             # No fallback files available, create one directly
-            waveform = generate_musical_theme(theme, duration=15.0)
             os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            save_wave_file(waveform, output_file)
-            return output_file
+            return render_theme(theme, output_file)
             
         # Try to find a matching theme
         matching_files = []
@@ -311,12 +459,12 @@ def get_fallback_music(theme, output_file):
                 matching_files.append(file)
                 
         # Choose a random matching file or any file if no match
-        chosen_file = random.choice(matching_files) if matching_files else random.choice(fallback_files)
+        candidates = matching_files or fallback_files
+        chosen_file = candidates[_rng.integers(len(candidates))]
         
-        # Copy the file to output location
+        # Copy the file to output location (shutil uses sendfile where available)
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(chosen_file, "rb") as src, open(output_file, "wb") as dst:
-            dst.write(src.read())
+        shutil.copyfile(chosen_file, output_file)
             
         print(f"Using fallback music: {chosen_file.name}")
         return output_file
@@ -335,21 +483,14 @@ def get_music_theme_from_scenes(scenes):
     Returns:
         A music theme description
     """
-    # Extract all tones from scenes
-    tones = [scene.get("tone", "").lower() for scene in scenes]
-    
-    # Count tone frequencies
-    tone_counts = {}
-    for tone in tones:
-        if tone in tone_counts:
-            tone_counts[tone] += 1
-        else:
-            tone_counts[tone] = 1
-            
-    # Find the most common tone
-    most_common_tone = max(tone_counts.items(), key=lambda x: x[1])[0] if tone_counts else "neutral"
+    # Find the most common tone (ties go to the tone seen first)
+    tone_counts = Counter(scene.get("tone", "").lower() for scene in scenes)
+    most_common_tone = tone_counts.most_common(1)[0][0] if tone_counts else "neutral"
+    
+    # Map to a music theme, trying an exact match before partial ones
+    if most_common_tone in DEFAULT_MUSIC_THEMES:
+        return DEFAULT_MUSIC_THEMES[most_common_tone]
     
-    # Map to a music theme
     for theme_key in DEFAULT_MUSIC_THEMES:
         if theme_key in most_common_tone or most_common_tone in theme_key:
             return DEFAULT_MUSIC_THEMES[theme_key]
@@ -1,23 +1,59 @@
 import os
 import json
+import asyncio
 import re
-import nltk
 import random
-from typing import List, Dict, Any
-import openai
-from dotenv import load_dotenv
+import hashlib
+import tempfile
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
 
-# Load environment variables
-load_dotenv()
+# pyahocorasick is optional; when installed it finds theme and emotion keywords
+# with an Aho-Corasick automaton instead of a regex scan
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
-# Configure OpenAI API
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# google-re2 is optional; when installed it runs the keyword context scans in linear time
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
 
-# Try to download nltk resources (for fallback mechanism)
+# orjson is optional; when installed it serializes the saved scenes natively
 try:
-    nltk.download('punkt', quiet=True)
-except:
-    pass
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Scene breakdown request settings
+SCENE_MODEL = "gpt-4-turbo"
+SCENE_SYSTEM_PROMPT = "You are an expert storyteller and visual designer breaking stories into compelling scenes."
+# Requests in flight for story_to_scenes_batch, and client retries on 429/5xx responses
+BATCH_CONCURRENCY = 8
+API_MAX_RETRIES = 3
+# Parsed API responses, keyed by a hash of the model and messages, so repeated
+# requests for the same story skip the network
+SCENE_CACHE_DIR = Path("outputs/cache/scenes")
+# Output directories already created by _ensure_dir
+_CREATED_DIRS = set()
+# Fields every scene in a model response must provide
+SCENE_FIELDS = ("description", "narration", "tone", "image_prompt")
+
+# Sentence boundaries: whitespace after terminal punctuation, which stays with its sentence
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+# Runs of terminal punctuation, which are dropped from the split sentences
+SENTENCE_PUNCTUATION_RE = re.compile(r'[.!?]+')
+
+# Common long words that make poor image prompt keywords
+STOPWORDS = frozenset({"there", "their", "which", "would", "could", "about", "through"})
 
 # Movie scene types for fallback generation
 SCENE_TYPES = [
@@ -40,46 +76,152 @@ CAMERA_SHOTS = [
     "low angle", "high angle", "tracking shot", "dolly zoom", "long shot"
 ]
 
+# Stories shorter than this (in characters) become a single fallback scene
+SHORT_STORY_CHARS = 100
+
+# Scene tones cycled through by the advanced and smart fallbacks
+ADVANCED_SCENE_TONES = ("mysterious", "joyful", "somber", "tense", "romantic", "adventurous", "dramatic", "peaceful")
+SMART_SCENE_TONES = ("mysterious", "adventurous", "emotional", "dramatic", "peaceful")
+
+# Location keywords that mark potential settings
+LOCATION_KEYWORDS = (
+    "room", "house", "city", "forest", "mountain", "sea", "ocean",
+    "building", "castle", "village", "town", "office", "school",
+    "garden", "park", "street", "road", "path", "kitchen", "bedroom"
+)
+
+# Common objects that might be important in stories
+OBJECT_KEYWORDS = (
+    "book", "letter", "key", "door", "window", "phone", "sword",
+    "ring", "necklace", "clock", "watch", "gun", "knife", "car",
+    "photograph", "picture", "painting", "box", "chair", "table",
+    "bed", "lamp", "light", "fire", "water", "food", "drink"
+)
+
+def _keyword_context_pattern(keywords, context_words):
+    """Compile a pattern matching any keyword with up to context_words words on each side"""
+    # Longer keywords first, so "bedroom" is not cut short as "bed"
+    alternation = "|".join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+    pattern = r'(?i)((?:\w+\s){0,%d}(?:%s)(?:\s\w+){0,%d})' % (context_words, alternation, context_words)
+    
+    # RE2 runs the pattern as an automaton instead of backtracking through the
+    # optional context words at every position (its \w and \s are ASCII-only)
+    if RE2_AVAILABLE:
+        return re2.compile(pattern)
+    return re.compile(pattern)
+
+# Keywords with their surrounding words, found in a single scan of the story
+SETTINGS_RE = _keyword_context_pattern(LOCATION_KEYWORDS, 3)
+OBJECTS_RE = _keyword_context_pattern(OBJECT_KEYWORDS, 2)
+
+# Words that follow another word not ending a sentence, and punctuation inside words
+MID_SENTENCE_WORD_RE = re.compile(r'(?<=[^\s.!?])\s+(\S+)')
+NON_WORD_CHARS_RE = re.compile(r'[^\w\s]')
+
+# Story themes and the keywords that suggest them
+THEME_KEYWORDS = {
+    "love": ["love", "heart", "romance", "affection", "passion"],
+    "friendship": ["friend", "friendship", "companion", "ally", "comrade"],
+    "betrayal": ["betray", "deception", "dishonesty", "treachery"],
+    "revenge": ["revenge", "vengeance", "retribution", "payback"],
+    "mystery": ["mystery", "enigma", "puzzle", "secret", "clue"],
+    "adventure": ["adventure", "journey", "quest", "expedition"],
+    "conflict": ["conflict", "struggle", "battle", "fight", "war"],
+    "transformation": ["change", "transform", "evolve", "metamorphosis"],
+    "redemption": ["redemption", "forgiveness", "atonement"],
+    "loss": ["loss", "grief", "mourning", "sorrow", "death"]
+}
+
+# Emotions and the keywords that suggest them
+EMOTION_KEYWORDS = {
+    "happy": ["happy", "joy", "delight", "pleased", "smile", "laugh"],
+    "sad": ["sad", "sorrow", "unhappy", "miserable", "cry", "tear"],
+    "angry": ["angry", "fury", "rage", "mad", "irritated", "annoyed"],
+    "afraid": ["fear", "afraid", "scared", "terrified", "dread"],
+    "surprised": ["surprise", "astonished", "amazed", "shocked"],
+    "disgust": ["disgust", "repulsed", "revolted"],
+    "anticipation": ["anticipation", "expectation", "excitement"],
+    "trust": ["trust", "belief", "faith", "confidence"],
+    "curious": ["curious", "intrigued", "interested"],
+    "confused": ["confused", "perplexed", "puzzled", "bewildered"]
+}
+
+def _keyword_category_scanner(keyword_map):
+    """
+    Build a function returning the set of categories whose keywords occur
+    (anywhere, even inside other words) in an already lowercased text,
+    using a single pass over the text
+    """
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for category, keywords in keyword_map.items():
+            for keyword in keywords:
+                automaton.add_word(keyword, automaton.get(keyword, frozenset()) | {category})
+        automaton.make_automaton()
+        
+        def scan(text_lower):
+            found = set()
+            for _, categories in automaton.iter(text_lower):
+                found |= categories
+            return found
+        return scan
+    
+    # With a zero-width lookahead every position is tried, so overlapping keywords
+    # are all seen. Only the longest keyword starting at a position is reported,
+    # so it also stands for the categories of the keywords that are its prefixes
+    keywords = sorted({keyword for words in keyword_map.values() for keyword in words}, key=len, reverse=True)
+    keyword_categories = {
+        keyword: {category for category, words in keyword_map.items() for word in words if keyword.startswith(word)}
+        for keyword in keywords
+    }
+    pattern = re.compile("(?=(%s))" % "|".join(map(re.escape, keywords)))
+    
+    def scan(text_lower):
+        found = set()
+        for keyword in set(pattern.findall(text_lower)):
+            found |= keyword_categories[keyword]
+        return found
+    return scan
+
+# Theme and emotion keywords share one scanner, with categories tagged by their kind
+_find_story_keywords = _keyword_category_scanner({
+    **{("theme", theme): keywords for theme, keywords in THEME_KEYWORDS.items()},
+    **{("emotion", emotion): keywords for emotion, keywords in EMOTION_KEYWORDS.items()}
+})
+
+@lru_cache(maxsize=8)
+def _story_keyword_categories(story_lower: str) -> frozenset:
+    """
+    (kind, category) pairs whose keywords occur in a lowercased story; cached so
+    extract_themes and extract_emotions on the same story share a single scan
+    """
+    return frozenset(_find_story_keywords(story_lower))
+
 def extract_characters(story_text: str) -> List[str]:
     """Extract potential character names from the story"""
-    # Simple extraction based on capitalized words not at the beginning of sentences
-    words = story_text.split()
-    
-    # Find potential character names (capitalized words not following periods)
-    potential_characters = []
-    for i, word in enumerate(words):
-        if i > 0 and word[0].isupper() and words[i-1][-1] not in ['.', '!', '?']:
+    # Simple extraction based on capitalized words not at the beginning of sentences:
+    # one scan yields every word whose previous word doesn't end with . ! or ?
+    name_counts = Counter()
+    for word in MID_SENTENCE_WORD_RE.findall(story_text):
+        if word[0].isupper():
             # Clean up punctuation
-            clean_word = re.sub(r'[^\w\s]', '', word)
-            if clean_word and len(clean_word) > 1:
-                potential_characters.append(clean_word)
-    
-    # Count occurrences to find most likely character names
-    char_count = {}
-    for char in potential_characters:
-        char_count[char] = char_count.get(char, 0) + 1
+            clean_word = NON_WORD_CHARS_RE.sub('', word)
+            if len(clean_word) > 1:
+                name_counts[clean_word] += 1
     
-    # Filter to characters mentioned at least twice
-    characters = [char for char, count in char_count.items() if count >= 1]
+    # Most frequently mentioned names first (ties keep story order)
+    characters = [name for name, _ in name_counts.most_common(5)]  # Limit to 5 characters max
     
     # Add some generic characters if none found
     if not characters:
         characters = ["Protagonist", "Character"]
     
-    return characters[:5]  # Limit to 5 characters max
+    return characters
 
 def extract_settings(story_text: str) -> List[str]:
     """Extract potential settings from the story"""
-    # Look for location keywords
-    location_keywords = ["room", "house", "city", "forest", "mountain", "sea", "ocean", 
-                        "building", "castle", "village", "town", "office", "school",
-                        "garden", "park", "street", "road", "path", "kitchen", "bedroom"]
-    
-    settings = []
-    for keyword in location_keywords:
-        pattern = r'(?i)((?:\w+\s){0,3}' + keyword + r'(?:\s\w+){0,3})'
-        matches = re.findall(pattern, story_text)
-        settings.extend(matches)
+    # Look for location keywords, in the order they appear in the story
+    settings = SETTINGS_RE.findall(story_text)
     
     # If no settings found, use generic ones
     if not settings:
@@ -89,45 +231,16 @@ def extract_settings(story_text: str) -> List[str]:
 
 def extract_key_objects(story_text: str) -> List[str]:
     """Extract potential key objects from the story"""
-    # Common objects that might be important in stories
-    object_keywords = ["book", "letter", "key", "door", "window", "phone", "sword", 
-                      "ring", "necklace", "clock", "watch", "gun", "knife", "car",
-                      "photograph", "picture", "painting", "box", "chair", "table",
-                      "bed", "lamp", "light", "fire", "water", "food", "drink"]
-    
-    objects = []
-    for keyword in object_keywords:
-        if keyword in story_text.lower():
-            # Get some context around the object
-            pattern = r'(?i)((?:\w+\s){0,2}' + keyword + r'(?:\s\w+){0,2})'
-            matches = re.findall(pattern, story_text)
-            objects.extend(matches)
+    # Get objects with some context around them, in the order they appear in the story
+    objects = OBJECTS_RE.findall(story_text)
     
     return objects[:5]  # Limit to 5 objects
 
-def extract_themes(story_text: str) -> List[str]:
-    """Extract potential themes from the story"""
-    theme_keywords = {
-        "love": ["love", "heart", "romance", "affection", "passion"],
-        "friendship": ["friend", "friendship", "companion", "ally", "comrade"],
-        "betrayal": ["betray", "deception", "dishonesty", "treachery"],
-        "revenge": ["revenge", "vengeance", "retribution", "payback"],
-        "mystery": ["mystery", "enigma", "puzzle", "secret", "clue"],
-        "adventure": ["adventure", "journey", "quest", "expedition"],
-        "conflict": ["conflict", "struggle", "battle", "fight", "war"],
-        "transformation": ["change", "transform", "evolve", "metamorphosis"],
-        "redemption": ["redemption", "forgiveness", "atonement"],
-        "loss": ["loss", "grief", "mourning", "sorrow", "death"]
-    }
-    
-    found_themes = []
-    story_lower = story_text.lower()
-    
-    for theme, keywords in theme_keywords.items():
-        for keyword in keywords:
-            if keyword in story_lower:
-                found_themes.append(theme)
-                break
+def extract_themes(story_text: str, story_lower: Optional[str] = None) -> List[str]:
+    """Extract potential themes from the story (story_lower: the story already lowercased)"""
+    # Keep the order of THEME_KEYWORDS
+    matched = _story_keyword_categories(story_text.lower() if story_lower is None else story_lower)
+    found_themes = [theme for theme in THEME_KEYWORDS if ("theme", theme) in matched]
     
     # If no themes found, add some generic ones
     if not found_themes:
@@ -135,29 +248,11 @@ def extract_themes(story_text: str) -> List[str]:
     
     return found_themes[:3]  # Limit to 3 themes
 
-def extract_emotions(story_text: str) -> List[str]:
-    """Extract potential emotions from the story"""
-    emotion_keywords = {
-        "happy": ["happy", "joy", "delight", "pleased", "smile", "laugh"],
-        "sad": ["sad", "sorrow", "unhappy", "miserable", "cry", "tear"],
-        "angry": ["angry", "fury", "rage", "mad", "irritated", "annoyed"],
-        "afraid": ["fear", "afraid", "scared", "terrified", "dread"],
-        "surprised": ["surprise", "astonished", "amazed", "shocked"],
-        "disgust": ["disgust", "repulsed", "revolted"],
-        "anticipation": ["anticipation", "expectation", "excitement"],
-        "trust": ["trust", "belief", "faith", "confidence"],
-        "curious": ["curious", "intrigued", "interested"],
-        "confused": ["confused", "perplexed", "puzzled", "bewildered"]
-    }
-    
-    found_emotions = []
-    story_lower = story_text.lower()
-    
-    for emotion, keywords in emotion_keywords.items():
-        for keyword in keywords:
-            if keyword in story_lower:
-                found_emotions.append(emotion)
-                break
+def extract_emotions(story_text: str, story_lower: Optional[str] = None) -> List[str]:
+    """Extract potential emotions from the story (story_lower: the story already lowercased)"""
+    # Keep the order of EMOTION_KEYWORDS
+    matched = _story_keyword_categories(story_text.lower() if story_lower is None else story_lower)
+    found_emotions = [emotion for emotion in EMOTION_KEYWORDS if ("emotion", emotion) in matched]
     
     # If no emotions found, add some generic ones
     if not found_emotions:
@@ -165,6 +260,56 @@ def extract_emotions(story_text: str) -> List[str]:
     
     return found_emotions
 
+def _story_seed(story_text: str) -> int:
+    """Stable random seed for a story, so its fallback scenes are the same in every run"""
+    return int.from_bytes(hashlib.blake2b(story_text.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _segment_text(text: str, num_scenes: int, sentence_pattern=SENTENCE_BOUNDARY_RE,
+                  joiner: str = ' ', terminator: str = '') -> List[str]:
+    """
+    Split story text into scene texts, by paragraph when there are enough of them
+    and otherwise by distributing sentences evenly across the scenes
+    
+    Args:
+        text: The stripped story text
+        num_scenes: Target number of scenes
+        sentence_pattern: Compiled pattern that splits the text into sentences
+        joiner: Separator between the sentences of a scene
+        terminator: Appended to each scene built from sentences
+        
+    Returns:
+        num_scenes scene texts, or just the sentences when there are fewer than num_scenes
+    """
+    # Try to split by paragraphs first
+    paragraphs = [p for p in map(str.strip, text.split('\n')) if p]
+    if len(paragraphs) >= num_scenes:
+        return paragraphs[:num_scenes]
+    
+    # Not enough paragraphs, so split by sentences
+    sentences = [s for s in map(str.strip, sentence_pattern.split(text)) if s]
+    if len(sentences) < num_scenes:
+        return sentences
+    
+    # Distribute sentences among scenes, the last scene taking the remainder
+    # (plain slicing: for a story's worth of sentences it is several times faster
+    # than np.array_split over an object array, which would also rebalance the scenes)
+    sentences_per_scene = len(sentences) // num_scenes
+    scene_texts = []
+    for i in range(num_scenes):
+        start_idx = i * sentences_per_scene
+        end_idx = start_idx + sentences_per_scene if i < num_scenes-1 else len(sentences)
+        scene_texts.append(joiner.join(sentences[start_idx:end_idx]) + terminator)
+    return scene_texts
+
+def _short_story_scene(text: str) -> Dict[str, Any]:
+    """Single scene covering a story too short to split"""
+    return {
+        "description": f"A visualization of the story: {text[:50]}...",
+        "narration": text,
+        "tone": "neutral",
+        "image_prompt": f"A cinematic scene depicting: {text[:50]}... with artistic lighting and detailed visuals."
+    }
+
 def create_advanced_fallback_scenes(story_text: str, num_scenes: int = 3) -> List[Dict[str, Any]]:
     """
     Create highly detailed fallback scenes by analyzing the story text
@@ -176,56 +321,39 @@ def create_advanced_fallback_scenes(story_text: str, num_scenes: int = 3) -> Lis
     Returns:
         List of scene dictionaries with rich details
     """
+    # Scenes are memoized per story; hand out copies so callers can't alter the cache
+    return [dict(scene) for scene in _advanced_fallback_scenes(story_text, num_scenes)]
+
+@lru_cache(maxsize=128)
+def _advanced_fallback_scenes(story_text: str, num_scenes: int) -> Tuple[Dict[str, Any], ...]:
+    """Build the scenes for create_advanced_fallback_scenes"""
     # Clean up and normalize the text
     text = story_text.strip()
     
-    # Get story elements through text analysis
+    # If very short text, just use as one scene; the extractors find little in it
+    if len(text) < SHORT_STORY_CHARS:
+        return (_short_story_scene(text),)
+    
+    # Random choices are seeded by the story, so the result is safe to cache
+    rng = random.Random(_story_seed(story_text))
+    
+    # Get story elements through text analysis (lowercasing the story only once)
+    text_lower = text.lower()
     characters = extract_characters(text)
     settings = extract_settings(text)
     objects = extract_key_objects(text)
-    themes = extract_themes(text)
-    emotions = extract_emotions(text)
-    
-    # Try to split by paragraphs first
-    paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+    themes = extract_themes(text, text_lower)
+    emotions = extract_emotions(text, text_lower)
     
-    # If not enough paragraphs, try to use sentence splitting
-    if len(paragraphs) < num_scenes:
-        try:
-            # Use NLTK if available
-            sentences = nltk.sent_tokenize(text)
-        except:
-            # Manual sentence splitting as fallback
-            sentences = re.split(r'[.!?]+', text)
-        
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        # Distribute sentences among scenes
-        if len(sentences) >= num_scenes:
-            sentences_per_scene = max(1, len(sentences) // num_scenes)
-            scene_texts = []
-            
-            for i in range(num_scenes):
-                start_idx = i * sentences_per_scene
-                end_idx = start_idx + sentences_per_scene if i < num_scenes-1 else len(sentences)
-                scene_text = ' '.join(sentences[start_idx:end_idx])
-                scene_texts.append(scene_text)
-        else:
-            # Not enough sentences, just use what we have
-            scene_texts = sentences[:num_scenes]
-            # Pad with empty strings if needed
-            scene_texts.extend([''] * (num_scenes - len(scene_texts)))
-    else:
-        # Use paragraphs
-        scene_texts = paragraphs[:num_scenes]
-        # Pad with empty strings if needed
-        scene_texts.extend([''] * (num_scenes - len(scene_texts)))
+    # Split into scene texts, padding with empty strings if the story is too short
+    scene_texts = _segment_text(text, num_scenes)
+    scene_texts.extend([''] * (num_scenes - len(scene_texts)))
     
     # Generate scenes with rich details
     scenes = []
-    scene_types = random.sample(SCENE_TYPES, min(num_scenes, len(SCENE_TYPES)))
-    cinematic_styles = random.sample(CINEMATIC_STYLES, min(num_scenes, len(CINEMATIC_STYLES)))
-    camera_shots = random.sample(CAMERA_SHOTS, min(num_scenes, len(CAMERA_SHOTS)))
+    scene_types = rng.sample(SCENE_TYPES, min(num_scenes, len(SCENE_TYPES)))
+    cinematic_styles = rng.sample(CINEMATIC_STYLES, min(num_scenes, len(CINEMATIC_STYLES)))
+    camera_shots = rng.sample(CAMERA_SHOTS, min(num_scenes, len(CAMERA_SHOTS)))
     
     for i, (scene_text, scene_type, style, shot) in enumerate(zip(scene_texts, scene_types, cinematic_styles, camera_shots)):
         # Get details for this scene
@@ -235,12 +363,11 @@ def create_advanced_fallback_scenes(story_text: str, num_scenes: int = 3) -> Lis
         theme = themes[i % len(themes)] if themes else "thematic"
         
         # Get objects for this scene
-        scene_objects = [obj for j, obj in enumerate(objects) if j % num_scenes == i] if objects else []
+        scene_objects = objects[i::num_scenes]
         object_text = ", featuring " + " and ".join(scene_objects) if scene_objects else ""
         
         # Determine scene tone
-        tones = ["mysterious", "joyful", "somber", "tense", "romantic", "adventurous", "dramatic", "peaceful"]
-        tone = tones[i % len(tones)]
+        tone = ADVANCED_SCENE_TONES[i % len(ADVANCED_SCENE_TONES)]
         
         # Create description with rich details
         description = f"Scene {i+1}: A {shot} of {character} in the {setting}, during a {scene_type} moment. {style}{object_text}. The atmosphere conveys a {tone} and {emotion} feeling, emphasizing the theme of {theme}."
@@ -258,7 +385,7 @@ def create_advanced_fallback_scenes(story_text: str, num_scenes: int = 3) -> Lis
             "image_prompt": image_prompt
         })
     
-    return scenes
+    return tuple(scenes)
 
 def create_smart_fallback_scenes(story_text: str, num_scenes: int = 3) -> List[Dict[str, Any]]:
     """
@@ -271,46 +398,27 @@ def create_smart_fallback_scenes(story_text: str, num_scenes: int = 3) -> List[D
     Returns:
         List of scene dictionaries
     """
+    # Scenes are memoized per story; hand out copies so callers can't alter the cache
+    return [dict(scene) for scene in _smart_fallback_scenes(story_text, num_scenes)]
+
+@lru_cache(maxsize=128)
+def _smart_fallback_scenes(story_text: str, num_scenes: int) -> Tuple[Dict[str, Any], ...]:
+    """Build the scenes for create_smart_fallback_scenes"""
     # Clean up and normalize the text
     text = story_text.strip()
     
     # If very short text, just use as one scene
-    if len(text) < 100:
-        return [{
-            "description": f"A visualization of the story: {text[:50]}...",
-            "narration": text,
-            "tone": "neutral",
-            "image_prompt": f"A cinematic scene depicting: {text[:50]}... with artistic lighting and detailed visuals."
-        }]
+    if len(text) < SHORT_STORY_CHARS:
+        return (_short_story_scene(text),)
     
-    # Try to split by paragraphs first
-    paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-    
-    # If not enough paragraphs, split by sentences
-    if len(paragraphs) < num_scenes:
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        # Calculate how many sentences per scene
-        if len(sentences) >= num_scenes:
-            sentences_per_scene = len(sentences) // num_scenes
-            scene_texts = []
-            
-            for i in range(num_scenes):
-                start_idx = i * sentences_per_scene
-                end_idx = start_idx + sentences_per_scene if i < num_scenes-1 else len(sentences)
-                scene_text = '. '.join(sentences[start_idx:end_idx]) + '.'
-                scene_texts.append(scene_text)
-        else:
-            # If not enough sentences, just use paragraphs or whole text
-            scene_texts = paragraphs if paragraphs else [text]
-    else:
-        # Use paragraphs if there are enough
-        scene_texts = paragraphs[:num_scenes]
+    # Split into scene texts; sentences lose their punctuation, so rejoin them with periods
+    scene_texts = _segment_text(text, num_scenes, SENTENCE_PUNCTUATION_RE, '. ', '.')
+    if len(scene_texts) < num_scenes:
+        # If not enough sentences, just use paragraphs or whole text
+        scene_texts = [p for p in map(str.strip, text.split('\n')) if p] or [text]
     
     # Generate scenes from the text segments
     scenes = []
-    tones = ["mysterious", "adventurous", "emotional", "dramatic", "peaceful"]
     
     for i, scene_text in enumerate(scene_texts):
         if i >= num_scenes:
@@ -318,10 +426,9 @@ def create_smart_fallback_scenes(story_text: str, num_scenes: int = 3) -> List[D
             
         # Extract key terms for better image prompts
         words = scene_text.lower().split()
-        keywords = [w for w in words if len(w) > 4 and w not in {"there", "their", "which", "would", "could", "about", "through"}]
-        keywords = keywords[:5]  # Take top 5 keywords
+        keywords = list(islice((w for w in words if len(w) > 4 and w not in STOPWORDS), 5))  # Take top 5 keywords
         
-        tone = tones[i % len(tones)]
+        tone = SMART_SCENE_TONES[i % len(SMART_SCENE_TONES)]
         
         scenes.append({
             "description": f"Scene {i+1}: {scene_text[:100]}...",
@@ -330,22 +437,36 @@ def create_smart_fallback_scenes(story_text: str, num_scenes: int = 3) -> List[D
             "image_prompt": f"A {tone} scene showing {' '.join(keywords)}. Cinematic lighting, detailed, artistic composition."
         })
     
-    return scenes
+    return tuple(scenes)
 
-def story_to_scenes(story_text: str, output_file: str = "outputs/scenes.json") -> List[Dict[str, Any]]:
+@lru_cache(maxsize=None)
+def _openai():
     """
-    Break down a short story into visual scenes using GPT-4
+    Import and configure the OpenAI library the first time a request is made,
+    so the local fallbacks and extractors never pay for importing it
+    
+    Returns:
+        The configured openai module
+    """
+    import openai
+    from dotenv import load_dotenv
+    
+    # Load environment variables and configure the OpenAI API
+    load_dotenv()
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+def _scene_prompt(story_text: str) -> str:
+    """
+    Build the GPT-4 prompt asking for a scene breakdown of a story
     
     Args:
         story_text: The input short story text
-        output_file: Path to save the JSON output
         
     Returns:
-        List of scene dictionaries containing descriptions and narration text
+        Prompt text for the user message
     """
-    try:
-        # Create the prompt for GPT-4
-        prompt = f"""
+    return f"""
         Break down the following short story into 2-4 distinct visual scenes for a narrated slideshow:
 
         STORY:
@@ -356,16 +477,18 @@ def story_to_scenes(story_text: str, output_file: str = "outputs/scenes.json") -
         2. Extract the narration text that should accompany this visual
         3. Suggest a brief emotional tone for this scene (e.g., "mysterious", "joyful", "tense")
         
-        Format your response as a JSON array with this structure:
-        [
-            {{
-                "description": "Detailed visual description for image generation (no text in image)",
-                "narration": "Text that should be read during this scene",
-                "tone": "emotional tone of the scene",
-                "image_prompt": "Optimized prompt for DALL-E image generation with style guidance"
-            }},
-            // additional scenes...
-        ]
+        Format your response as a JSON object with this structure:
+        {{
+            "scenes": [
+                {{
+                    "description": "Detailed visual description for image generation (no text in image)",
+                    "narration": "Text that should be read during this scene",
+                    "tone": "emotional tone of the scene",
+                    "image_prompt": "Optimized prompt for DALL-E image generation with style guidance"
+                }},
+                // additional scenes...
+            ]
+        }}
         
         IMPORTANT GUIDELINES:
         - Make each scene visually distinct
@@ -375,43 +498,231 @@ def story_to_scenes(story_text: str, output_file: str = "outputs/scenes.json") -
         - Don't include text overlay instructions in image descriptions
         - Keep the original story's emotional tone
         """
+
+def _scene_messages(story_text: str) -> List[Dict[str, str]]:
+    """Chat messages for a scene breakdown request"""
+    return [
+        {"role": "system", "content": SCENE_SYSTEM_PROMPT},
+        {"role": "user", "content": _scene_prompt(story_text)}
+    ]
+
+def _validate_scenes(scenes: Any) -> List[Dict[str, Any]]:
+    """
+    Check that parsed scenes have the shape the rest of the pipeline expects
+    
+    Args:
+        scenes: Parsed "scenes" value from the model response
         
-        try:
-            # Call the OpenAI API
-            response = openai.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert storyteller and visual designer breaking stories into compelling scenes."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+    Returns:
+        The scenes, unchanged
+        
+    Raises:
+        ValueError: If the value is not a non-empty list of scenes with string fields
+    """
+    if not isinstance(scenes, list) or not scenes:
+        raise ValueError("Response contained no scenes")
+    for scene in scenes:
+        if not isinstance(scene, dict) or not all(isinstance(scene.get(field), str) for field in SCENE_FIELDS):
+            raise ValueError(f"Malformed scene in response: {scene!r}")
+    return scenes
+
+def _parse_scenes(json_response: str) -> List[Dict[str, Any]]:
+    """
+    Parse the scene list out of a JSON-mode model response
+    
+    Args:
+        json_response: Message content returned by the model, or the prefix of it
+            _JSONStreamCollector closed after the "scenes" array
+        
+    Returns:
+        List of scene dictionaries
+    """
+    return _validate_scenes(json.loads(json_response)["scenes"])
+
+class _JSONStreamCollector:
+    """
+    Accumulates streamed response text until the top-level "scenes" array closes
+    
+    The JSON structure is tracked from the first character, with brackets inside
+    strings ignored, so only the array that is the value of the top-level "scenes"
+    key ends collection; arrays or bracketed text in other fields don't. The fields
+    after it are not needed, so the object is closed right after that array.
+    """
+    
+    def __init__(self):
+        self.raw = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_chars = []  # The string being read, when it may be a top-level key
+        self.last_string = None  # Last string closed directly inside the top-level object
+        self.key = None  # Top-level key whose value is being read
+        self.collecting = False  # Inside the "scenes" array
+    
+    def feed(self, text: str) -> Optional[str]:
+        """
+        Add a streamed chunk of text
+        
+        Args:
+            text: Next chunk of the response
             
-            # Extract and parse the JSON response
-            json_response = response.choices[0].message.content
+        Returns:
+            The top-level object up to and including the "scenes" array, closed so it
+            parses as JSON, once that array has closed; otherwise None
+        """
+        self.raw.append(text)
+        for i, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_string = ''.join(self.string_chars)
+                    continue
+                if self.depth == 1:
+                    self.string_chars.append(char)
+            elif char == '"':
+                self.in_string = True
+                self.string_chars = []
+            elif char in '[{':
+                if char == '[' and self.depth == 1 and self.key == "scenes":
+                    self.collecting = True
+                self.depth += 1
+            elif char in ']}':
+                self.depth -= 1
+                if self.collecting and self.depth == 1:
+                    self.raw[-1] = text[:i + 1]
+                    return self.text() + '}'
+            elif self.depth == 1:
+                # Between the fields of the top-level object
+                if char == ':':
+                    self.key = self.last_string
+                elif char == ',':
+                    self.key = None
+        return None
+    
+    def text(self) -> str:
+        """All of the response text received so far"""
+        return ''.join(self.raw)
+
+def _stream_delta(chunk) -> str:
+    """Text content of one streamed completion chunk"""
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+def _collect_scenes(stream) -> List[Dict[str, Any]]:
+    """
+    Parse scenes from a streamed completion, closing the stream as soon as the array ends
+    
+    Args:
+        stream: Streaming chat completion
+        
+    Returns:
+        List of scene dictionaries
+    """
+    collector = _JSONStreamCollector()
+    for chunk in stream:
+        json_content = collector.feed(_stream_delta(chunk))
+        if json_content is not None:
+            stream.close()
+            return _parse_scenes(json_content)
+    return _parse_scenes(collector.text())
+
+async def _collect_scenes_async(stream) -> List[Dict[str, Any]]:
+    """Async counterpart of _collect_scenes"""
+    collector = _JSONStreamCollector()
+    async for chunk in stream:
+        json_content = collector.feed(_stream_delta(chunk))
+        if json_content is not None:
+            await stream.close()
+            return _parse_scenes(json_content)
+    return _parse_scenes(collector.text())
+
+def _ensure_dir(directory) -> None:
+    """Create a directory once per process; later calls for it skip the filesystem"""
+    if directory and directory not in _CREATED_DIRS:
+        os.makedirs(directory, exist_ok=True)
+        _CREATED_DIRS.add(directory)
+
+def _scene_cache_file(messages: List[Dict[str, str]]) -> Path:
+    """Cache file for the response to a scene breakdown request"""
+    key = hashlib.sha256(json.dumps([SCENE_MODEL, messages]).encode("utf-8")).hexdigest()
+    return SCENE_CACHE_DIR / f"{key}.json"
+
+def _load_cached_scenes(cache_file: Path) -> Optional[List[Dict[str, Any]]]:
+    """Scenes from an earlier identical request, or None on a cache miss"""
+    try:
+        with open(cache_file) as f:
+            return _validate_scenes(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+def _store_cached_scenes(cache_file: Path, scenes: List[Dict[str, Any]]) -> None:
+    """Cache the scenes parsed from an API response"""
+    try:
+        _ensure_dir(SCENE_CACHE_DIR)
+        # Write under a temporary name so concurrent readers never see a partial file
+        with tempfile.NamedTemporaryFile('w', dir=SCENE_CACHE_DIR, suffix=".tmp", delete=False) as f:
+            json.dump(scenes, f)
+        os.replace(f.name, cache_file)
+    except OSError as e:
+        print(f"Could not cache scenes: {e}")
+
+def _save_scenes(scenes: List[Dict[str, Any]], output_file: str) -> None:
+    """Write scenes to a JSON file, creating its directory if needed"""
+    _ensure_dir(os.path.dirname(output_file))
+    if ORJSON_AVAILABLE:
+        # Same two-space layout, written straight to bytes as UTF-8
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(scenes, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(scenes, f, indent=2)
+
+def story_to_scenes(story_text: str, output_file: str = "outputs/scenes.json",
+                    use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Break down a short story into visual scenes using GPT-4
+    
+    Args:
+        story_text: The input short story text
+        output_file: Path to save the JSON output
+        use_cache: Reuse the response to an earlier identical request
+        
+    Returns:
+        List of scene dictionaries containing descriptions and narration text
+    """
+    try:
+        try:
+            messages = _scene_messages(story_text)
+            cache_file = _scene_cache_file(messages)
+            scenes = _load_cached_scenes(cache_file) if use_cache else None
             
-            # Find JSON content (in case there's surrounding text)
-            import re
-            json_match = re.search(r'\[.*\]', json_response, re.DOTALL)
-            if json_match:
-                json_content = json_match.group(0)
-            else:
-                json_content = json_response
+            if scenes is None:
+                # Call the OpenAI API, streaming so parsing overlaps generation
+                stream = _openai().chat.completions.create(
+                    model=SCENE_MODEL,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=2000,
+                    response_format={"type": "json_object"},
+                    stream=True
+                )
                 
-            # Parse JSON
-            scenes = json.loads(json_content)
+                # Extract and parse the JSON response
+                scenes = _collect_scenes(stream)
+                _store_cached_scenes(cache_file, scenes)
         except Exception as api_error:
             print(f"API call failed: {api_error}")
             # Use advanced fallback if API call fails
             scenes = create_advanced_fallback_scenes(story_text)
         
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        
         # Save to file
-        with open(output_file, 'w') as f:
-            json.dump(scenes, f, indent=2)
+        _save_scenes(scenes, output_file)
             
         return scenes
         
@@ -422,14 +733,107 @@ def story_to_scenes(story_text: str, output_file: str = "outputs/scenes.json") -
         
         # Try to save fallback scenes
         try:
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            with open(output_file, 'w') as f:
-                json.dump(fallback_scenes, f, indent=2)
+            _save_scenes(fallback_scenes, output_file)
         except Exception:
             pass
             
         return fallback_scenes
 
+async def _story_to_scenes_async(client: "openai.AsyncOpenAI", semaphore: asyncio.Semaphore,
+                                 story_text: str, cache_file: Path) -> List[Dict[str, Any]]:
+    """
+    Request a scene breakdown for one story, falling back to local scenes on failure
+    
+    Args:
+        client: Shared async OpenAI client
+        semaphore: Bounds the number of requests in flight
+        story_text: The input short story text
+        cache_file: Where to cache the parsed response
+        
+    Returns:
+        List of scene dictionaries
+    """
+    async with semaphore:
+        try:
+            stream = await client.chat.completions.create(
+                model=SCENE_MODEL,
+                messages=_scene_messages(story_text),
+                temperature=0.7,
+                max_tokens=2000,
+                response_format={"type": "json_object"},
+                stream=True
+            )
+            scenes = await _collect_scenes_async(stream)
+            _store_cached_scenes(cache_file, scenes)
+            return scenes
+        except Exception as api_error:
+            print(f"API call failed: {api_error}")
+            return create_advanced_fallback_scenes(story_text)
+
+async def story_to_scenes_batch_async(stories: List[str], concurrency: int = BATCH_CONCURRENCY,
+                                      use_cache: bool = True) -> List[List[Dict[str, Any]]]:
+    """
+    Break down several stories concurrently, overlapping the API round-trips
+    
+    Args:
+        stories: Story texts to break down
+        concurrency: Maximum number of requests in flight
+        use_cache: Reuse the responses to earlier identical requests
+        
+    Returns:
+        One list of scene dictionaries per story, in input order
+    """
+    cache_files = [_scene_cache_file(_scene_messages(story)) for story in stories]
+    results = [_load_cached_scenes(cache_file) if use_cache else None for cache_file in cache_files]
+    misses = [i for i, scenes in enumerate(results) if scenes is None]
+    if not misses:
+        return results
+    
+    # The client retries 429 and 5xx responses itself with exponential backoff
+    openai = _openai()
+    client = openai.AsyncOpenAI(api_key=openai.api_key, max_retries=API_MAX_RETRIES)
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        fetched = await asyncio.gather(
+            *(_story_to_scenes_async(client, semaphore, stories[i], cache_files[i]) for i in misses)
+        )
+    finally:
+        await client.close()
+    
+    for i, scenes in zip(misses, fetched):
+        results[i] = scenes
+    return results
+
+def story_to_scenes_batch(stories: List[str], output_files: Optional[List[str]] = None,
+                          concurrency: int = BATCH_CONCURRENCY,
+                          use_cache: bool = True) -> List[List[Dict[str, Any]]]:
+    """
+    Break down several stories into visual scenes with concurrent GPT-4 requests
+    
+    Args:
+        stories: Story texts to break down
+        output_files: Optional JSON output path for each story
+        concurrency: Maximum number of requests in flight
+        use_cache: Reuse the responses to earlier identical requests
+        
+    Returns:
+        One list of scene dictionaries per story, in input order
+    """
+    try:
+        results = asyncio.run(story_to_scenes_batch_async(stories, concurrency, use_cache))
+    except Exception as e:
+        print(f"Error breaking stories into scenes: {e}")
+        results = [create_advanced_fallback_scenes(story) for story in stories]
+    
+    if output_files:
+        for scenes, output_file in zip(results, output_files):
+            try:
+                _save_scenes(scenes, output_file)
+            except Exception as e:
+                print(f"Error saving scenes to {output_file}: {e}")
+    
+    return results
+
 if __name__ == "__main__":
     # For testing
     test_story = """
@@ -1,26 +1,58 @@
 import os
 import time
-from typing import List, Dict, Any, Optional
+import subprocess
+import tempfile
+from concurrent.futures import wait
+from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
 from pathlib import Path
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from moviepy.editor import (
     ImageClip, AudioFileClip, CompositeAudioClip, 
-    concatenate_videoclips, CompositeVideoClip, TextClip,
+    concatenate_videoclips, TextClip,
     VideoFileClip, ColorClip
 )
+from moviepy.audio.AudioClip import AudioArrayClip
+from moviepy.config import get_setting
+from utils.workers import cpu_executor
+
+# Hardware H.264 encoders tried in order by hwaccel="auto": (codec, preset, extra ffmpeg parameters)
+HARDWARE_ENCODERS = (
+    ("h264_nvenc", "p4", ["-pix_fmt", "yuv420p"]),
+    ("h264_videotoolbox", "medium", ["-pix_fmt", "yuv420p"]),
+    ("h264_vaapi", "medium", ["-vaapi_device", "/dev/dri/renderD128", "-vf", "format=nv12,hwupload"]),
+    ("h264_amf", "balanced", ["-pix_fmt", "yuv420p"]),
+)
+
+# Software encoder used when no hardware encoder works
+SOFTWARE_ENCODER = ("libx264", "medium", None)
+
+# Largest video frame; bigger scene images are scaled down once before encoding
+MAX_FRAME_SIZE = (1280, 720)
+
+@lru_cache(maxsize=8)
+def _load_font(size):
+    """Load the text font once per size, falling back to PIL's default font"""
+    try:
+        return ImageFont.truetype("Arial", size)
+    except IOError:
+        return ImageFont.load_default()
 
 def create_placeholder_image(text, width=1024, height=1024):
     """Create a placeholder image with text"""
+    # Rendered once per text and size; callers get a copy they are free to modify
+    return _placeholder_image(text, width, height).copy()
+
+@lru_cache(maxsize=32)
+def _placeholder_image(text, width, height):
+    """Render the placeholder image for create_placeholder_image"""
     # Create a new image with a gradient background
     img = Image.new('RGB', (width, height), color=(73, 109, 137))
     d = ImageDraw.Draw(img)
     
     # Try to load a font, use default if not available
-    try:
-        font = ImageFont.truetype("Arial", 32)
-    except IOError:
-        font = ImageFont.load_default()
+    font = _load_font(32)
     
     # Add the scene description text
     text_wrap = text[:200] + "..." if len(text) > 200 else text
@@ -43,23 +75,27 @@ def create_text_image(text, width=1024, height=200, bg_color=(0, 0, 0, 128)):
     d = ImageDraw.Draw(img)
     
     # Try to load a font, use default if not available
-    try:
-        font = ImageFont.truetype("Arial", 24)
-    except IOError:
-        font = ImageFont.load_default()
+    font = _load_font(24)
     
     # Add the text
     text_wrap = text[:100] + "..." if len(text) > 100 else text
+    # Greedy wrap from a running width, measuring each word once instead of re-measuring the line
     lines = []
     words = text_wrap.split()
+    max_width = width - 40
+    space_width = d.textlength(" ", font=font)
     line = []
+    line_width = 0.0
     for word in words:
-        line.append(word)
-        text_width = d.textlength(" ".join(line), font=font)
-        if text_width > width - 40:
-            line.pop()
+        word_width = d.textlength(word, font=font)
+        text_width = line_width + space_width + word_width if line else word_width
+        if text_width > max_width:
             lines.append(" ".join(line))
             line = [word]
+            line_width = word_width
+        else:
+            line.append(word)
+            line_width = text_width
     if line:
         lines.append(" ".join(line))
     
@@ -72,10 +108,110 @@ def create_text_image(text, width=1024, height=200, bg_color=(0, 0, 0, 128)):
     
     return img
 
+@lru_cache(maxsize=256)
+def _text_overlay_pixels(text, width):
+    """RGBA pixels of the narration overlay for a text and video width (cached, read-only)"""
+    pixels = np.array(create_text_image(text, width=width))
+    pixels.flags.writeable = False
+    return pixels
+
+@lru_cache(maxsize=None)
+def _detect_hwaccel() -> Optional[Tuple[str, str, Optional[List[str]]]]:
+    """
+    Find a hardware H.264 encoder that actually works on this machine (checked once per process)
+    
+    Returns:
+        (codec, preset, ffmpeg parameters) of the first working encoder, or None
+    """
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    try:
+        listing = subprocess.run([ffmpeg, "-hide_banner", "-encoders"],
+                                 capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    
+    for codec, preset, params in HARDWARE_ENCODERS:
+        if codec not in listing:
+            continue
+        # Being compiled in doesn't mean the device is there, so encode a few test frames
+        probe = [ffmpeg, "-hide_banner", "-loglevel", "error",
+                 "-f", "lavfi", "-i", "color=c=black:s=64x64:d=0.1",
+                 "-vcodec", codec, "-preset", preset, *params, "-f", "null", "-"]
+        try:
+            if subprocess.run(probe, capture_output=True, timeout=20).returncode == 0:
+                return codec, preset, params
+        except (OSError, subprocess.SubprocessError):
+            continue
+    return None
+
+def video_encoder_settings(hwaccel: Optional[str] = "auto") -> Tuple[str, str, Optional[List[str]]]:
+    """
+    Choose the video encoder for write_videofile
+    
+    Args:
+        hwaccel: "auto" to use a working hardware encoder if there is one, the name
+            of an encoder from HARDWARE_ENCODERS, or None for software encoding
+        
+    Returns:
+        (codec, preset, ffmpeg parameters)
+    """
+    if hwaccel == "auto":
+        return _detect_hwaccel() or SOFTWARE_ENCODER
+    for settings in HARDWARE_ENCODERS:
+        if settings[0] == hwaccel:
+            return settings
+    return SOFTWARE_ENCODER
+
+def _fit_frame_size(width, height):
+    """
+    Size of a frame scaled down to fit MAX_FRAME_SIZE, keeping its aspect ratio;
+    scaled sizes are rounded down to even numbers as yuv420p needs
+    """
+    scale = min(MAX_FRAME_SIZE[0] / width, MAX_FRAME_SIZE[1] / height)
+    if scale >= 1.0:
+        return width, height
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+def create_scene_frame(image, narration):
+    """
+    Load a scene image with its narration overlay already blended in
+    
+    Both layers are static, so they are composited once here instead of by
+    MoviePy for every encoded frame. Images larger than MAX_FRAME_SIZE are
+    scaled down first, so the encoder gets no more pixels than the video needs.
+    
+    Args:
+        image: Path to the scene image, or an already loaded PIL image
+        narration: Narration text to overlay at the bottom (may be empty)
+        
+    Returns:
+        RGB pixels of the frame
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    image = image.convert('RGB')
+    frame_size = _fit_frame_size(*image.size)
+    if frame_size != image.size:
+        image = image.resize(frame_size, Image.LANCZOS)
+    
+    # Add narration text overlay using our custom PIL function
+    if narration:
+        try:
+            # Only the strip under the caption is blended, not the whole frame
+            overlay = Image.fromarray(_text_overlay_pixels(narration, image.width))
+            box = (0, image.height - overlay.height, image.width, image.height)
+            strip = image.crop(box).convert('RGBA')
+            strip.alpha_composite(overlay)
+            image.paste(strip.convert('RGB'), box)
+        except Exception as text_error:
+            print(f"Error adding text overlay: {text_error}")
+    
+    return np.array(image)
+
+@lru_cache(maxsize=32)
 def create_silent_audio(duration=5.0):
-    """Create a silent audio clip of specified duration"""
+    """Create a silent audio clip of specified duration (cached per duration; clips are never modified in place)"""
     from moviepy.audio.AudioClip import AudioClip
-    import numpy as np
     
     # Create a silent audio clip
     silent_audio = AudioClip(
@@ -84,6 +220,24 @@ def create_silent_audio(duration=5.0):
     )
     return silent_audio
 
+def _audio_samples(audio_clip):
+    """Decode an audio clip into one (samples, channels) float array at its own frame rate"""
+    # Chunks are stacked from a list, which NumPy 2 requires
+    return np.vstack(list(audio_clip.iter_chunks(fps=audio_clip.fps, chunksize=50000)))
+
+def _array_audio_clip(samples, fps):
+    """
+    Audio clip playing a (samples, channels) array, with its duration set
+    
+    AudioArrayClip truncates fps * t to find each sample, which repeats or skips
+    samples when t rounds just below it; times are nudged the way MoviePy's file
+    reader does, so a decoded clip plays back exactly as it was read.
+    """
+    clip = AudioArrayClip(samples, fps=fps)
+    array_frame = clip.make_frame
+    clip.make_frame = lambda t: array_frame(t + 0.00001 / fps)
+    return clip.set_duration(len(samples) / fps)  # also sets the end mixing relies on
+
 def ensure_audio_duration(audio_clip, target_duration):
     """Ensure audio clip matches the target duration"""
     if audio_clip.duration > target_duration:
@@ -95,6 +249,77 @@ def ensure_audio_duration(audio_clip, target_duration):
         return CompositeAudioClip([audio_clip, silence.set_start(audio_clip.duration)])
     return audio_clip
 
+def _write_still_slideshow(frames, durations, fade_duration, audio_clip, output_file, hwaccel, fps=24):
+    """
+    Encode a slideshow of still frames with a single ffmpeg run, bypassing MoviePy's writer
+    
+    Each frame is written once and looped by ffmpeg for its scene, with the fade
+    to and from black that crossfadein/crossfadeout give in a composed
+    concatenation, so no per-frame pixels pass through Python.
+    
+    Args:
+        frames: RGB pixels of each scene
+        durations: Duration of each scene in seconds
+        fade_duration: Duration of each scene's fade in and fade out in seconds
+        audio_clip: Soundtrack of the whole slideshow (optional)
+        output_file: Path to save the video
+        hwaccel: Hardware encoder selection, see video_encoder_settings
+        fps: Frame rate of the video
+        
+    Returns:
+        True if the video was written, False if the caller should use MoviePy instead
+    """
+    codec, preset, ffmpeg_params = video_encoder_settings(hwaccel)
+    if ffmpeg_params and "-vf" in ffmpeg_params:
+        # The encoder brings its own filter chain (the VAAPI upload), which this graph can't take
+        return False
+    
+    # Smaller frames are centered on black, as method="compose" does
+    width = max(frame.shape[1] for frame in frames)
+    height = max(frame.shape[0] for frame in frames)
+    
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            command = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error"]
+            filters = []
+            for i, (frame, duration) in enumerate(zip(frames, durations)):
+                frame_path = os.path.join(temp_dir, f"scene_{i+1}.png")
+                Image.fromarray(frame).save(frame_path, compress_level=1)
+                command += ["-loop", "1", "-framerate", str(fps), "-t", str(duration), "-i", frame_path]
+                
+                chain = f"[{i}:v]pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
+                if fade_duration > 0:
+                    chain += (
+                        f",fade=t=in:st=0:d={fade_duration}"
+                        f",fade=t=out:st={duration - fade_duration}:d={fade_duration}"
+                    )
+                filters.append(f"{chain}[v{i}]")
+            scene_labels = "".join(f"[v{i}]" for i in range(len(frames)))
+            filters.append(f"{scene_labels}concat=n={len(frames)}:v=1:a=0,format=yuv420p[video]")
+            
+            # The soundtrack is mixed by MoviePy into one file and muxed in
+            audio_maps = []
+            if audio_clip is not None:
+                audio_path = os.path.join(temp_dir, "audio.wav")
+                audio_clip.write_audiofile(audio_path, fps=44100, nbytes=2, codec="pcm_s16le", logger=None)
+                command += ["-i", audio_path]
+                audio_maps = ["-map", f"{len(frames)}:a", "-c:a", "aac"]
+            
+            command += ["-filter_complex", ";".join(filters), "-map", "[video]"] + audio_maps
+            command += ["-c:v", codec, "-preset", preset, "-r", str(fps)]
+            if codec == "libx264":
+                command += ["-tune", "stillimage"]
+            command += (ffmpeg_params or []) + [output_file]
+            
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"ffmpeg slideshow encode failed: {result.stderr.strip()[-500:]}")
+                return False
+        return True
+    except Exception as e:
+        print(f"Error encoding slideshow with ffmpeg: {e}")
+        return False
+
 def create_slideshow(
     scenes: List[Dict[str, Any]], 
     image_paths: List[str], 
@@ -102,7 +327,8 @@ def create_slideshow(
     music_path: Optional[str] = None,
     output_file: str = "outputs/final_video.mp4",
     fade_duration: float = 1.0,
-    music_volume: float = 0.2  # Reduced music volume so voice is more prominent
+    music_volume: float = 0.2,  # Reduced music volume so voice is more prominent
+    hwaccel: Optional[str] = "auto"
 ) -> Optional[str]:
     """
     Create a narrated slideshow video from scenes, images, voiceovers and background music
@@ -115,10 +341,14 @@ def create_slideshow(
         output_file: Path to save the final video
         fade_duration: Duration of fade transitions in seconds
         music_volume: Volume level for background music (0.0 to 1.0)
+        hwaccel: Hardware encoder selection, see video_encoder_settings
         
     Returns:
         Path to the generated video file, or None if generation failed
     """
+    # Scene frames are loaded and placeholder images saved on the shared pool
+    io_pool = cpu_executor()
+    pending_writes = []
     try:
         print("Creating narrated slideshow...")
         
@@ -128,122 +358,110 @@ def create_slideshow(
         # Create a list to store video clips
         video_clips = []
         
+        # Read the scene fields once into parallel lists used by the loops below
+        descriptions = [scene.get("description", f"Scene {i+1}") for i, scene in enumerate(scenes)]
+        narrations = [scene.get("narration", "") for scene in scenes]
+        
+        # Placeholder images are used from memory while their files are saved in the background,
+        # and scene frames are loaded concurrently; writes are awaited before encoding
+        frame_sources = []
+        
         # Check if we have enough files - if not, create placeholders
         if not image_paths and scenes:
             # Create placeholder images
             print("Creating placeholder images for scenes...")
-            for i, scene in enumerate(scenes):
-                desc = scene.get("description", f"Scene {i+1}")
+            for i, desc in enumerate(descriptions):
                 # Create a placeholder file
                 output_path = os.path.join("outputs/images", f"scene_{i+1}.png")
                 img = create_placeholder_image(desc)
                 os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                img.save(output_path)
+                pending_writes.append(io_pool.submit(img.save, output_path))
                 image_paths.append(output_path)
-                
-        # Process each scene
-        for i, scene in enumerate(scenes):
-            scene_duration = 8.0  # Default duration in seconds
-            
+                frame_sources.append(img)
+        
+        for i, desc in enumerate(descriptions[len(frame_sources):], start=len(frame_sources)):
             # Get image path for this scene
-            scene_image_path = None
             if i < len(image_paths):
-                scene_image_path = image_paths[i]
+                frame_sources.append(image_paths[i])
             else:
                 # Create a placeholder image
-                desc = scene.get("description", f"Scene {i+1}")
                 temp_img = create_placeholder_image(desc)
                 temp_path = f"outputs/images/temp_scene_{i+1}.png"
                 os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-                temp_img.save(temp_path)
-                scene_image_path = temp_path
-            
-            # Get audio path for this scene
-            scene_audio_path = None
-            if i < len(audio_paths) and os.path.exists(audio_paths[i]):
-                scene_audio_path = audio_paths[i]
+                pending_writes.append(io_pool.submit(temp_img.save, temp_path))
+                frame_sources.append(temp_img)
+        
+        # Load every frame, with the narration text baked in
+        frame_futures = [
+            io_pool.submit(create_scene_frame, source, narration)
+            for source, narration in zip(frame_sources, narrations)
+        ]
+                
+        # Audio path for each scene, None where it is missing
+        scene_audio_paths = [
+            audio_paths[i] if i < len(audio_paths) and os.path.exists(audio_paths[i]) else None
+            for i in range(len(scenes))
+        ]
+        
+        # Frame and duration of each scene, for encoding them directly with ffmpeg
+        # (not possible once a scene falls back to a color clip)
+        scene_frames = []
+        scene_durations = []
+        still_scenes = True
+        
+        # Process each scene
+        for i, (frame_future, scene_audio_path) in enumerate(zip(frame_futures, scene_audio_paths)):
+            scene_duration = 8.0  # Default duration in seconds
             
             try:
-                # Create image clip
-                img_clip = ImageClip(scene_image_path)
+                # Create image clip, with the narration text baked into its single frame
+                frame = frame_future.result()
+                img_clip = ImageClip(frame)
                 
-                # First set a fixed duration to avoid timing issues
+                # The scene keeps its fixed duration; narrations are trimmed or padded to it
                 img_clip = img_clip.set_duration(scene_duration)
                 
-                # Set audio if available
+                # Set audio if available, falling back to silence
+                audio_clip = None
                 if scene_audio_path:
                     try:
-                        # Create a silent backup audio just in case
-                        silent_audio = create_silent_audio(scene_duration)
+                        # Load the audio file directly, boosting the voice volume once in its samples
+                        # (unclipped, like volumex; the writer clips the final mix with the music)
+                        voice_file = AudioFileClip(scene_audio_path)
+                        voice = _audio_samples(voice_file) * 1.5
+                        fps = voice_file.fps
+                        voice_file.close()
                         
-                        try:
-                            # Load the audio file directly
-                            audio_clip = AudioFileClip(scene_audio_path)
-                            
-                            # Fix duration issues by ensuring audio is not longer than image
-                            audio_duration = min(audio_clip.duration, scene_duration)
-                            scene_duration = max(scene_duration, audio_duration)
-                            
-                            # Ensure both clips have the same duration
-                            audio_clip = ensure_audio_duration(audio_clip, scene_duration)
-                            img_clip = img_clip.set_duration(scene_duration)
-                            
-                            # Boost voice volume
-                            audio_clip = audio_clip.volumex(1.5)
-                            img_clip = img_clip.set_audio(audio_clip)
-                        except Exception as e:
-                            print(f"Error loading audio: {e}")
-                            img_clip = img_clip.set_audio(silent_audio)
-                    except Exception as audio_error:
-                        print(f"Audio error: {audio_error}")
-                        # Last resort fallback
-                        img_clip = img_clip.set_duration(scene_duration)
-                else:
-                    # No audio available, use silent clip
-                    silent_audio = create_silent_audio(scene_duration)
-                    img_clip = img_clip.set_audio(silent_audio)
+                        # Fit the samples to the scene duration here, so the scene audio stays one
+                        # array clip rather than a trimmed or silence-padded composite
+                        num_frames = int(scene_duration * fps)
+                        if len(voice) != num_frames:
+                            voice = voice[:num_frames]
+                            voice = np.pad(voice, ((0, num_frames - len(voice)), (0, 0)))
+                        audio_clip = _array_audio_clip(voice, fps)
+                    except Exception as e:
+                        print(f"Error loading audio: {e}")
                 
-                # Make sure duration is properly set after audio handling
-                img_clip = img_clip.set_duration(scene_duration)
+                if audio_clip is None:
+                    audio_clip = create_silent_audio(scene_duration)
+                img_clip = img_clip.set_audio(audio_clip)
                 
                 # Add a fade in/out effect
                 img_clip = img_clip.crossfadein(fade_duration)
                 img_clip = img_clip.crossfadeout(fade_duration)
                 
-                # Add narration text overlay using our custom PIL function
-                narration = scene.get("narration", "")
-                if narration:
-                    try:
-                        # Create text image overlay
-                        text_img_path = f"outputs/images/text_overlay_{i+1}.png"
-                        text_img = create_text_image(narration, width=img_clip.w)
-                        text_img.save(text_img_path)
-                        
-                        # Load text image as clip
-                        text_clip = ImageClip(text_img_path)
-                        text_clip = text_clip.set_duration(img_clip.duration)
-                        text_clip = text_clip.set_position(('center', 'bottom'))
-                        
-                        # Composite image and text
-                        img_clip = CompositeVideoClip([img_clip, text_clip])
-                        
-                        # Clean up temporary text image
-                        try:
-                            os.remove(text_img_path)
-                        except:
-                            pass
-                    except Exception as text_error:
-                        print(f"Error adding text overlay: {text_error}")
-                
                 # Add clip to list
                 video_clips.append(img_clip)
+                scene_frames.append(frame)
+                scene_durations.append(scene_duration)
                 
             except Exception as e:
                 print(f"Error processing scene {i+1}: {e}")
+                still_scenes = False
                 # Create a text clip as fallback
                 try:
                     # Create a colored background as fallback
-                    color_clip = ColorClip(size=(1024, 1024), color=(0, 0, 128))
+                    color_clip = ColorClip(size=_fit_frame_size(1024, 1024), color=(0, 0, 128))
                     color_clip = color_clip.set_duration(scene_duration)
                     silent_audio = create_silent_audio(scene_duration)
                     color_clip = color_clip.set_audio(silent_audio)
@@ -266,17 +484,15 @@ def create_slideshow(
                 
                 # Loop the music if needed to match video duration
                 if music_clip.duration < final_clip.duration:
-                    # Create multiple copies of the music
-                    num_loops = int(np.ceil(final_clip.duration / music_clip.duration))
-                    music_parts = [music_clip] * num_loops
-                    extended_music = concatenate_videoclips(music_parts).subclip(0, final_clip.duration)
-                    music_clip = extended_music
+                    # Decode the music once, set its volume and tile it to the video length in a single array
+                    fps = music_clip.fps
+                    music = _audio_samples(music_clip) * music_volume
+                    needed = int(final_clip.duration * fps)
+                    num_loops = int(np.ceil(needed / len(music)))
+                    music_clip = _array_audio_clip(np.tile(music, (num_loops, 1))[:needed], fps)
                 else:
-                    # Cut music to match video duration
-                    music_clip = music_clip.subclip(0, final_clip.duration)
-                
-                # Set volume
-                music_clip = music_clip.volumex(music_volume)
+                    # Cut music to match video duration and set its volume
+                    music_clip = music_clip.subclip(0, final_clip.duration).volumex(music_volume)
                 
                 # Mix audio - ensure voice audio is preserved
                 if final_clip.audio:
@@ -294,15 +510,27 @@ def create_slideshow(
             except Exception as e:
                 print(f"Error adding background music: {e}")
         
-        # Write final video file
-        print(f"Writing video to {output_file}...")
+        # Make sure every placeholder image has been saved
+        for write in pending_writes:
+            write.result()
+        
+        # Write final video file, straight from the still frames when possible
+        codec, preset, ffmpeg_params = video_encoder_settings(hwaccel)
+        print(f"Writing video to {output_file} with {codec}...")
+        if still_scenes and _write_still_slideshow(
+            scene_frames, scene_durations, fade_duration, final_clip.audio, output_file, hwaccel
+        ):
+            print("Video created successfully!")
+            return output_file
+        
         final_clip.write_videofile(
             output_file, 
-            codec="libx264", 
+            codec=codec, 
             audio_codec="aac", 
             fps=24,
             threads=4,
-            preset="medium"
+            preset=preset,
+            ffmpeg_params=ffmpeg_params
         )
         
         print("Video created successfully!")
@@ -313,12 +541,16 @@ def create_slideshow(
         import traceback
         traceback.print_exc()
         return None
+    finally:
+        # Don't return while placeholder images are still being written
+        wait(pending_writes)
 
 def add_title_screen(
     video_path: str, 
     title: str, 
     output_file: str = None,
-    duration: float = 3.0
+    duration: float = 3.0,
+    hwaccel: Optional[str] = "auto"
 ) -> Optional[str]:
     """
     Add a title screen to the beginning of a video
@@ -328,6 +560,7 @@ def add_title_screen(
         title: Title text to display
         output_file: Path to save the new video
         duration: Duration of title screen in seconds
+        hwaccel: Hardware encoder selection, see video_encoder_settings
         
     Returns:
         Path to the output video, or None if failed
@@ -356,11 +589,14 @@ def add_title_screen(
         final_clip = concatenate_videoclips([txt_clip, video_clip])
         
         # Write final video
+        codec, preset, ffmpeg_params = video_encoder_settings(hwaccel)
         final_clip.write_videofile(
             output_file,
-            codec="libx264",
+            codec=codec,
             audio_codec="aac",
-            fps=24
+            fps=24,
+            preset=preset,
+            ffmpeg_params=ffmpeg_params
         )
         
         return output_file
@@ -369,9 +605,17 @@ def add_title_screen(
         print(f"Error adding title screen: {e}")
         return None
     
+def _list_files(directory):
+    """Names in a directory as a set (empty if the directory doesn't exist)"""
+    try:
+        return set(os.listdir(directory))
+    except OSError:
+        return set()
+
 def create_story_video(
     scenes: List[Dict[str, Any]],
-    output_dir: str = "outputs"
+    output_dir: str = "outputs",
+    hwaccel: Optional[str] = "auto"
 ) -> Optional[str]:
     """
     Create a complete story video from generated scenes and media
@@ -379,41 +623,46 @@ def create_story_video(
     Args:
         scenes: List of scene dictionaries
         output_dir: Directory containing generated media
+        hwaccel: Hardware encoder selection, see video_encoder_settings
         
     Returns:
         Path to the final video, or None if failed
     """
     try:
-        # Collect image paths
+        # Each media directory is listed once; files are then looked up in memory
         image_dir = os.path.join(output_dir, "images")
+        audio_dir = os.path.join(output_dir, "voice")
+        music_dir = os.path.join(output_dir, "music")
+        image_files = _list_files(image_dir)
+        audio_files = _list_files(audio_dir)
+        music_files = _list_files(music_dir)
+        
+        # Collect image paths
         image_paths = []
         for i in range(len(scenes)):
-            img_path = os.path.join(image_dir, f"scene_{i+1}.png")
-            if os.path.exists(img_path):
-                image_paths.append(img_path)
+            img_name = f"scene_{i+1}.png"
+            if img_name in image_files:
+                image_paths.append(os.path.join(image_dir, img_name))
                 
         # Collect audio paths
-        audio_dir = os.path.join(output_dir, "voice")
         audio_paths = []
         for i in range(len(scenes)):
             # Try both WAV and MP3 format
-            wav_path = os.path.join(audio_dir, f"scene_{i+1}.wav")
-            mp3_path = os.path.join(audio_dir, f"scene_{i+1}.mp3")
+            wav_name = f"scene_{i+1}.wav"
+            mp3_name = f"scene_{i+1}.mp3"
             
-            if os.path.exists(wav_path):
-                audio_paths.append(wav_path)
-            elif os.path.exists(mp3_path):
-                audio_paths.append(mp3_path)
+            if wav_name in audio_files:
+                audio_paths.append(os.path.join(audio_dir, wav_name))
+            elif mp3_name in audio_files:
+                audio_paths.append(os.path.join(audio_dir, mp3_name))
                 
-        # Check if we have music
-        music_path = os.path.join(output_dir, "music", "bg_music.wav")
-        if not os.path.exists(music_path):
-            # Try MP3 format
-            mp3_music_path = os.path.join(output_dir, "music", "bg_music.mp3") 
-            if os.path.exists(mp3_music_path):
-                music_path = mp3_music_path
-            else:
-                music_path = None
+        # Check if we have music (WAV, else MP3)
+        if "bg_music.wav" in music_files:
+            music_path = os.path.join(music_dir, "bg_music.wav")
+        elif "bg_music.mp3" in music_files:
+            music_path = os.path.join(music_dir, "bg_music.mp3")
+        else:
+            music_path = None
             
         # Create output video path
         output_file = os.path.join(output_dir, "final_video.mp4")
@@ -424,7 +673,8 @@ def create_story_video(
             image_paths=image_paths,
             audio_paths=audio_paths,
             music_path=music_path,
-            output_file=output_file
+            output_file=output_file,
+            hwaccel=hwaccel
         )
         
     except Exception as e:
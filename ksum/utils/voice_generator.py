@@ -1,14 +1,19 @@
 import os
-import time
-import array
 import wave
 import math
-import random
 import struct
 import numpy as np
 from typing import List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
+from utils.workers import cpu_executor
+
+# numba is optional; without it the narration tone is synthesized with NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
@@ -16,6 +21,144 @@ load_dotenv()
 # Configure ElevenLabs API (if available)
 elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
 
+# Shape of the narration tone
+SYLLABLE_RATE = 4  # Syllables per second (slowed down)
+VIBRATO_AMOUNT = 0.01
+PATTERN_IDS = {"neutral": 0, "rising": 1, "falling": 2, "wavering": 3}
+
+# Emotional keywords that set the tone's pitch, in order of precedence
+SENTIMENT_KEYWORDS = (
+    ("positive", ("happy", "joy", "exciting", "thrill")),
+    ("negative", ("sad", "sorrow", "tragic", "gloomy")),
+    ("tension", ("tension", "fear", "scary", "danger")),
+)
+
+def _tone_sentiment(lower_text):
+    """First sentiment in SENTIMENT_KEYWORDS with a keyword in the text, or None"""
+    # Plain substring checks that stop at the first hit; CPython's substring search
+    # beats one alternation regex over the whole text for this few keywords
+    for sentiment, keywords in SENTIMENT_KEYWORDS:
+        for keyword in keywords:
+            if keyword in lower_text:
+                return sentiment
+    return None
+
+if NUMBA_AVAILABLE:
+    # Releases the GIL rather than using numba's own threads: generate_voice_for_scenes
+    # already synthesizes narrations on the shared thread pool
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _synth_tone_kernel(out, noise, sample_rate, base_freq, pattern_id, amplitude, duration, fade_duration):
+        """Fill out with the tone waveform in one pass over the samples, without temporaries"""
+        two_pi = 2.0 * np.pi
+        for i in range(out.shape[0]):
+            t = i / sample_rate
+            
+            # Syllable envelope
+            position = (t * SYLLABLE_RATE) % 1.0
+            if position < 0.4:
+                syllable_amp = 0.95 + 0.05 * np.sin(position * two_pi / 0.4)
+            else:
+                syllable_amp = 0.85 * (1.0 - (position - 0.4) / 0.6)
+            
+            # Pitch contour (0 neutral, 1 rising, 2 falling, 3 wavering)
+            if pattern_id == 1:
+                frequency = base_freq * (1.0 + 0.1 * t / duration)
+            elif pattern_id == 2:
+                frequency = base_freq * (1.0 + 0.1 * (1.0 - t / duration))
+            elif pattern_id == 3:
+                frequency = base_freq * (1.0 + 0.1 * np.sin(two_pi * t / 1.5))
+            else:
+                frequency = base_freq
+            frequency *= 1.0 + VIBRATO_AMOUNT * np.sin(two_pi * 5.0 * t)
+            
+            value = syllable_amp * amplitude * np.sin(two_pi * frequency * t)
+            if int(t * 2.0) % 2 == 0:
+                value += 0.15 * np.sin(two_pi * 12.0 * t) * amplitude
+            value += noise[i]
+            
+            if t < fade_duration:
+                value *= t / fade_duration
+            elif t > duration - fade_duration:
+                value *= (duration - t) / fade_duration
+            out[i] = int(value)
+
+def _synth_tone(num_samples, sample_rate, base_freq, pattern_id, amplitude, duration, fade_duration, rng):
+    """
+    Synthesize the narration tone as 16-bit samples
+    
+    Args:
+        num_samples: Number of samples to generate
+        sample_rate: Samples per second
+        base_freq: Base pitch in Hz
+        pattern_id: Pitch contour, one of PATTERN_IDS
+        amplitude: Peak amplitude of the tone
+        duration: Duration in seconds
+        fade_duration: Length of the fade-in and fade-out in seconds
+        rng: NumPy random generator the noise is drawn from
+        
+    Returns:
+        int16 array of samples
+    """
+    # The noise is drawn the same way on both paths so they produce the same tone
+    # (single precision is plenty for a noise floor, and halves the buffer)
+    noise = rng.uniform(-0.03 * amplitude, 0.03 * amplitude, num_samples).astype(np.float32)
+    
+    if NUMBA_AVAILABLE:
+        audio_data = np.empty(num_samples, dtype=np.int16)
+        _synth_tone_kernel(audio_data, noise, sample_rate, base_freq, pattern_id, amplitude, duration, fade_duration)
+        return audio_data
+    
+    # Time of every sample in seconds; the whole waveform is built from array expressions
+    time_points = np.arange(num_samples) / sample_rate
+    
+    # Create a speech-like rhythm
+    syllable_position = (time_points * SYLLABLE_RATE) % 1.0
+    
+    # Different amplitude envelope for syllables
+    syllable_amp = np.where(
+        syllable_position < 0.4,
+        0.95 + 0.05 * np.sin(syllable_position * 2 * math.pi / 0.4),
+        0.85 * (1 - (syllable_position - 0.4) / 0.6)
+    )
+    
+    # Apply different patterns based on text sentiment
+    if pattern_id == PATTERN_IDS["rising"]:
+        freq_mod = base_freq * (1 + 0.1 * time_points / duration)
+    elif pattern_id == PATTERN_IDS["falling"]:
+        freq_mod = base_freq * (1 + 0.1 * (1 - time_points / duration))
+    elif pattern_id == PATTERN_IDS["wavering"]:
+        freq_mod = base_freq * (1 + 0.1 * np.sin(2 * math.pi * time_points / 1.5))
+    else:  # neutral
+        freq_mod = base_freq
+        
+    # Add some variations to make it more speech-like
+    vibrato = np.sin(2 * math.pi * 5 * time_points)
+    
+    # Add word-like articulation effects
+    articulation = np.where(
+        (time_points * 2).astype(np.int64) % 2 == 0,  # Every 0.5 seconds
+        0.15 * np.sin(2 * math.pi * 12 * time_points),  # Faster variation for articulation
+        0.0
+    )
+    
+    # Calculate sample values with all modulations
+    frequency = freq_mod * (1 + VIBRATO_AMOUNT * vibrato)
+    samples = syllable_amp * amplitude * np.sin(2 * math.pi * frequency * time_points)
+    samples += articulation * amplitude  # Add articulation effect
+    
+    # Add some noise for more realistic speech
+    samples += noise
+    
+    # Apply fade-in and fade-out
+    samples *= np.where(
+        time_points < fade_duration,
+        time_points / fade_duration,
+        np.where(time_points > duration - fade_duration, (duration - time_points) / fade_duration, 1.0)
+    )
+    
+    # Store the samples (truncating toward zero like int())
+    return samples.astype(np.int16)
+
 def text_to_speech_tone(text, output_file, duration=None):
     """Generate a simple speech-like tone pattern based on text"""
     # Calculate duration based on text length if not provided
@@ -29,113 +172,42 @@ def text_to_speech_tone(text, output_file, duration=None):
     amplitude = 20000  # Increased amplitude for more volume
     
     # Generate a seed from the text for consistent results with same text
-    seed = sum(ord(c) for c in text[:20])
-    random.seed(seed)
+    # (one private generator for the pitch and the noise, so concurrent narrations don't share random state)
+    rng = np.random.default_rng(sum(ord(c) for c in text[:20]))
     
     # Create different frequencies based on the text sentiment
     # Check for emotional keywords
-    lower_text = text.lower()
-    if any(word in lower_text for word in ['happy', 'joy', 'exciting', 'thrill']):
-        base_freq = random.uniform(350, 440)  # Higher frequency for positive emotion
+    sentiment = _tone_sentiment(text.lower())
+    if sentiment == "positive":
+        base_freq = rng.uniform(350, 440)  # Higher frequency for positive emotion
         pattern = "rising"
-    elif any(word in lower_text for word in ['sad', 'sorrow', 'tragic', 'gloomy']):
-        base_freq = random.uniform(200, 280)  # Lower frequency for negative emotion
+    elif sentiment == "negative":
+        base_freq = rng.uniform(200, 280)  # Lower frequency for negative emotion
         pattern = "falling"
-    elif any(word in lower_text for word in ['tension', 'fear', 'scary', 'danger']):
-        base_freq = random.uniform(300, 350)  # Mid frequency with variations for tension
+    elif sentiment == "tension":
+        base_freq = rng.uniform(300, 350)  # Mid frequency with variations for tension
         pattern = "wavering"
     else:
-        base_freq = random.uniform(280, 320)  # Neutral frequency
+        base_freq = rng.uniform(280, 320)  # Neutral frequency
         pattern = "neutral"
         
     # Calculate how many samples we need
     num_samples = int(sample_rate * duration)
+    fade_duration = min(0.3, duration / 10)
+    audio_data = _synth_tone(num_samples, sample_rate, base_freq, PATTERN_IDS[pattern], amplitude, duration, fade_duration, rng)
     
-    # Initialize the audio data array
-    audio_data = array.array('h', [0] * num_samples)
-    
-    # Create speech-like patterns based on the text
-    for i in range(num_samples):
-        time_point = i / sample_rate  # Time in seconds
-        
-        # Create a speech-like rhythm
-        syllable_rate = 4  # Syllables per second (slowed down)
-        syllable_position = (time_point * syllable_rate) % 1.0
-        
-        # Different amplitude envelope for syllables
-        if syllable_position < 0.4:
-            syllable_amp = 0.95 + 0.05 * math.sin(syllable_position * 2 * math.pi / 0.4)
-        else:
-            syllable_amp = 0.85 * (1 - (syllable_position - 0.4) / 0.6)
-        
-        # Apply different patterns based on text sentiment
-        if pattern == "rising":
-            freq_mod = base_freq * (1 + 0.1 * time_point / duration)
-        elif pattern == "falling":
-            freq_mod = base_freq * (1 + 0.1 * (1 - time_point / duration))
-        elif pattern == "wavering":
-            freq_mod = base_freq * (1 + 0.1 * math.sin(2 * math.pi * time_point / 1.5))
-        else:  # neutral
-            freq_mod = base_freq
-            
-        # Add some variations to make it more speech-like
-        vibrato = math.sin(2 * math.pi * 5 * time_point)
-        vibrato_amount = 0.01
-        
-        # Add word-like articulation effects
-        if int(time_point * 2) % 2 == 0:  # Every 0.5 seconds
-            articulation = 0.15 * math.sin(2 * math.pi * 12 * time_point)  # Faster variation for articulation
-        else:
-            articulation = 0
-        
-        # Calculate sample value with all modulations
-        frequency = freq_mod * (1 + vibrato_amount * vibrato)
-        sample_value = syllable_amp * amplitude * math.sin(2 * math.pi * frequency * time_point)
-        sample_value += articulation * amplitude  # Add articulation effect
-        
-        # Add some noise for more realistic speech
-        noise = random.uniform(-0.03 * amplitude, 0.03 * amplitude)
-        sample_value += noise
-        
-        # Apply fade-in and fade-out
-        fade_duration = min(0.3, duration / 10)
-        if time_point < fade_duration:
-            fade_factor = time_point / fade_duration
-        elif time_point > duration - fade_duration:
-            fade_factor = (duration - time_point) / fade_duration
-        else:
-            fade_factor = 1.0
-            
-        sample_value *= fade_factor
-        
-        # Store the sample
-        audio_data[i] = int(sample_value)
+    # Duplicate the samples into both channels of a stereo file, which works better with MoviePy
+    stereo_data = np.empty((num_samples, 2), dtype='<i2')  # 16-bit little-endian, as WAV expects
+    stereo_data[:, 0] = audio_data  # Left channel
+    stereo_data[:, 1] = audio_data  # Right channel
     
-    # Create a WAV file
+    # Create the WAV file
     with wave.open(output_file, 'w') as wav_file:
-        # Set parameters
-        wav_file.setnchannels(1)  # Mono
-        wav_file.setsampwidth(2)  # 2 bytes for 'h' short
-        wav_file.setframerate(sample_rate)
-        wav_file.writeframes(audio_data.tobytes())
-    
-    # Create a stereo version of the audio which works better with MoviePy
-    stereo_output = output_file.replace('.wav', '_stereo.wav')
-    stereo_data = array.array('h', [0] * num_samples * 2)
-    for i in range(num_samples):
-        stereo_data[i*2] = audio_data[i]     # Left channel
-        stereo_data[i*2+1] = audio_data[i]   # Right channel
-    
-    with wave.open(stereo_output, 'w') as wav_file:
         wav_file.setnchannels(2)  # Stereo
         wav_file.setsampwidth(2)  # 2 bytes
         wav_file.setframerate(sample_rate)
         wav_file.writeframes(stereo_data.tobytes())
     
-    # Replace original with stereo version
-    import shutil
-    shutil.move(stereo_output, output_file)
-    
     return output_file
 
 def generate_silent_wave_file(output_file: str, duration: float = 5.0):
@@ -154,8 +226,8 @@ def generate_silent_wave_file(output_file: str, duration: float = 5.0):
     # Calculate the number of frames
     num_frames = int(duration * sample_rate)
     
-    # Create silent audio data (all zeros)
-    silence_data = array.array('h', [0] * num_frames * num_channels)
+    # Create silent audio data (all zeros, 16-bit little-endian)
+    silence_data = np.zeros(num_frames * num_channels, dtype='<i2')
     
     # Create a Wave_write object
     with wave.open(output_file, 'w') as wav_file:
@@ -209,7 +281,6 @@ def generate_voice_for_scenes(scenes, output_dir="outputs/voice") -> List[str]:
         List of paths to the generated audio files
     """
     os.makedirs(output_dir, exist_ok=True)
-    audio_paths = []
     
     # Clean the output directory first to avoid stale files
     for file in os.listdir(output_dir):
@@ -219,24 +290,18 @@ def generate_voice_for_scenes(scenes, output_dir="outputs/voice") -> List[str]:
             except:
                 pass
     
-    # For this demo, we'll just use the fallback approach
-    for i, scene in enumerate(scenes):
-        # Get the narration text from the scene
-        narration = scene.get("narration", "")
-        
-        # Skip if no narration
-        if not narration:
-            continue
-            
-        # Generate the voice narration
-        output_file = os.path.join(output_dir, f"scene_{i+1}.wav")
-        audio_path = generate_fallback_audio(narration, output_file)
-            
-        if audio_path:
-            audio_paths.append(audio_path)
-            
-        # Add a small delay between files
-        time.sleep(0.1)
+    # For this demo, we'll just use the fallback approach; scenes without narration are skipped
+    jobs = [
+        (scene.get("narration", ""), os.path.join(output_dir, f"scene_{i+1}.wav"))
+        for i, scene in enumerate(scenes) if scene.get("narration", "")
+    ]
+    
+    # Each narration goes to its own file and the synthesis releases the GIL,
+    # so scenes are generated concurrently on the shared pool
+    results = cpu_executor().map(lambda job: generate_fallback_audio(*job), jobs)
+    
+    # Collect in scene order
+    audio_paths = [audio_path for audio_path in results if audio_path]
             
     return audio_paths
 
@@ -0,0 +1,22 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Threads for CPU-bound media work; NumPy, the numba kernels, PIL and zlib
+# release the GIL, so threads run it in parallel without process start-up costs
+CPU_WORKERS = os.cpu_count() or 4
+
+@lru_cache(maxsize=None)
+def cpu_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool shared by every pipeline stage for its per-scene CPU work
+
+    Created on first use and kept for the life of the process, so the voice,
+    music and video stages submit into one pool instead of each starting their
+    own. Only submit leaf tasks: work running here must never wait on other
+    work submitted here, or a full pool deadlocks.
+
+    Returns:
+        The shared ThreadPoolExecutor
+    """
+    return ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="media")